@@ -6,6 +6,35 @@ from datetime import datetime
 # Configuration
 API_BASE_URL = "http://localhost:8000"
 
+
+def iter_sse(response):
+    """Yield (event, data) pairs from a server-sent event stream."""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if not line:
+            if data_lines:
+                yield event, json.loads("\n".join(data_lines))
+            event, data_lines = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[len("data:"):].strip())
+
+
+def progress_label(data):
+    """Human readable label for a graph progress event."""
+    labels = {
+        "retriveal": "Searching documents and memory...",
+        "reasoning": "Drafting answer...",
+        "tool_execution": "Running tools...",
+        "final_response": "Finalizing answer...",
+        "answer_cache": "Answered from cache"
+    }
+    label = labels.get(data.get("node"), "Working...")
+    if data.get("tools"):
+        label += f" ({', '.join(data['tools'])})"
+    return label
+
 st.set_page_config(page_title="RAG-Bot Client", layout="wide")
 st.title("🤖 RAG-Bot Client")
 
@@ -35,10 +64,11 @@ with st.sidebar:
     # Document list
     if st.button("📋 List Documents"):
         try:
-            response = requests.get(f"{API_BASE_URL}/documents/")
+            response = requests.get(f"{API_BASE_URL}/documents/", params={"limit": 100})
             if response.status_code == 200:
-                docs = response.json()["documents"]
-                st.write("**Uploaded Documents:**")
+                data = response.json()
+                docs = data["documents"]
+                st.write(f"**Uploaded Documents ({data['total']}):**")
                 for doc in docs:
                     st.write(f"- {doc['filename']} ({doc['chunk_count']} chunks)")
         except Exception as e:
@@ -69,8 +99,8 @@ with st.sidebar:
             if response.status_code == 200:
                 history = response.json()["history"]
                 st.write("**Chat History:**")
-                for item in history[-5:]:  # Last 5 items
-                    st.text_area("", value=item["content"], height=100, disabled=True)
+                for item in history[-10:]:  # Last 5 interactions
+                    st.text_area(item["role"].title(), value=item["content"], height=100, disabled=True)
         except Exception as e:
             st.error(f"Error fetching history: {e}")
     
@@ -107,49 +137,74 @@ if prompt := st.chat_input("Ask me anything about your documents..."):
     with st.chat_message("user"):
         st.write(prompt)
     
-    # Get bot response
+    # Get bot response, rendered token by token from the SSE stream
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            try:
-                chat_data = {
-                    "message": prompt,
-                    "session_id": session_id,
-                    "user_id": "streamlit_user"
+        status_placeholder = st.empty()
+        answer_placeholder = st.empty()
+        status_placeholder.caption("Thinking...")
+        try:
+            chat_data = {
+                "message": prompt,
+                "session_id": session_id,
+                "user_id": "streamlit_user"
+            }
+            
+            response = requests.post(
+                f"{API_BASE_URL}/chat/stream",
+                json=chat_data,
+                headers={"Content-Type": "application/json"},
+                stream=True
+            )
+            
+            if response.status_code == 200:
+                answer = ""
+                answer_node = None
+                sources = []
+                for event, data in iter_sse(response):
+                    if event == "token":
+                        # A new node means the answer is being rewritten
+                        if data["node"] != answer_node:
+                            answer_node = data["node"]
+                            answer = ""
+                        answer += data["content"]
+                        answer_placeholder.markdown(answer + "▌")
+                    elif event == "progress":
+                        status_placeholder.caption(progress_label(data))
+                    elif event == "sources":
+                        sources = data["sources"]
+                    elif event == "done":
+                        answer = data["response"]
+                    elif event == "error":
+                        raise RuntimeError(data["detail"])
+                
+                status_placeholder.empty()
+                answer_placeholder.markdown(answer)
+                
+                # Add assistant message with sources
+                assistant_msg = {
+                    "role": "assistant",
+                    "content": answer,
+                    "sources": sources
                 }
+                st.session_state.messages.append(assistant_msg)
                 
-                response = requests.post(
-                    f"{API_BASE_URL}/chat/",
-                    json=chat_data,
-                    headers={"Content-Type": "application/json"}
-                )
+                # Show sources
+                if sources:
+                    with st.expander("📚 Sources"):
+                        for source in sources:
+                            st.write(f"**{source['type'].title()}**: {source.get('content', 'N/A')}")
                 
-                if response.status_code == 200:
-                    bot_response = response.json()
-                    st.write(bot_response["response"])
-                    
-                    # Add assistant message with sources
-                    assistant_msg = {
-                        "role": "assistant",
-                        "content": bot_response["response"],
-                        "sources": bot_response.get("sources", [])
-                    }
-                    st.session_state.messages.append(assistant_msg)
-                    
-                    # Show sources
-                    if bot_response.get("sources"):
-                        with st.expander("📚 Sources"):
-                            for source in bot_response["sources"]:
-                                st.write(f"**{source['type'].title()}**: {source.get('content', 'N/A')}")
-                    
-                else:
-                    error_msg = f"Error: {response.status_code} - {response.text}"
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
-                    
-            except Exception as e:
-                error_msg = f"Connection error: {str(e)}"
+            else:
+                status_placeholder.empty()
+                error_msg = f"Error: {response.status_code} - {response.text}"
                 st.error(error_msg)
                 st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                
+        except Exception as e:
+            status_placeholder.empty()
+            error_msg = f"Connection error: {str(e)}"
+            st.error(error_msg)
+            st.session_state.messages.append({"role": "assistant", "content": error_msg})
 
 # Footer with server status
 st.markdown("---")
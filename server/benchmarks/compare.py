@@ -0,0 +1,72 @@
+"""Diff two benchmark results.
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 10]
+
+Prints p50/p95/p99 and throughput side by side with the relative change.
+Exits with status 1 if any p95 got slower, or throughput lower, by more
+than ``--threshold`` percent, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+
+def change(before: float, after: float) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(baseline: Dict, candidate: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Return report lines and the regressions found."""
+    lines, regressions = [], []
+    header = f"{'':<28}{'metric':>16}{'baseline':>12}{'candidate':>12}{'change':>10}"
+    for section in ("endpoints", "nodes"):
+        lines.append(f"\n[{section}]\n{header}")
+        for name in sorted(set(baseline.get(section, {})) | set(candidate.get(section, {}))):
+            before = baseline.get(section, {}).get(name)
+            after = candidate.get(section, {}).get(name)
+            if before is None or after is None:
+                lines.append(f"{name:<28}{'only in ' + ('candidate' if before is None else 'baseline'):>50}")
+                continue
+            for metric in ("p50_ms", "p95_ms", "p99_ms", "throughput_rps"):
+                if metric not in before or metric not in after:
+                    continue
+                delta = change(before[metric], after[metric])
+                worse = -delta if metric == "throughput_rps" else delta
+                flag = ""
+                if metric in ("p95_ms", "throughput_rps") and worse > threshold:
+                    flag = "  REGRESSION"
+                    regressions.append(f"{section}.{name}.{metric}: {delta:+.1f}%")
+                lines.append(f"{name:<28}{metric:>16}{before[metric]:>12.1f}{after[metric]:>12.1f}{delta:>+9.1f}%{flag}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Allowed slowdown in percent")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    print(f"baseline:  {baseline.get('name')} ({baseline.get('git_commit')})")
+    print(f"candidate: {candidate.get('name')} ({candidate.get('git_commit')})")
+    if baseline.get("config") != candidate.get("config"):
+        print("warning: runs used different settings; differences may not be regressions")
+
+    lines, regressions = compare(baseline, candidate, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold}%:")
+        print("\n".join(f"  {r}" for r in regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Synthetic documents and queries, reproducible from a seed."""
+import random
+from typing import List, Tuple
+
+TOPICS = [
+    "billing", "deployment", "authentication", "caching", "indexing", "backups",
+    "monitoring", "networking", "storage", "scheduling", "permissions", "migrations"
+]
+VOCABULARY = (
+    "service request latency throughput replica cluster node queue worker token "
+    "session cache index shard partition retry timeout config policy schema table "
+    "query result record version upgrade rollback alert metric threshold budget"
+).split()
+
+
+def _sentence(rng: random.Random, topic: str) -> str:
+    words = [rng.choice(VOCABULARY) for _ in range(rng.randint(8, 16))]
+    words.insert(rng.randrange(len(words)), topic)
+    if rng.random() < 0.1:
+        # Identifier-like tokens exercise the lexical retrieval path
+        words.append(f"ERR-{rng.randint(100, 999)}")
+    return " ".join(words).capitalize() + "."
+
+
+def make_document(rng: random.Random, index: int, size_chars: int) -> Tuple[str, bytes]:
+    """One .txt document of roughly ``size_chars`` about a few topics."""
+    topics = rng.sample(TOPICS, 3)
+    paragraphs = []
+    length = 0
+    while length < size_chars:
+        topic = rng.choice(topics)
+        paragraph = " ".join(_sentence(rng, topic) for _ in range(rng.randint(3, 6)))
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return f"bench_doc_{index:04d}.txt", "\n\n".join(paragraphs).encode()
+
+
+def make_corpus(count: int, size_chars: int, seed: int = 0) -> List[Tuple[str, bytes]]:
+    rng = random.Random(seed)
+    return [make_document(rng, i, size_chars) for i in range(count)]
+
+
+def make_queries(count: int, web_rate: float = 0.1, seed: int = 0) -> List[str]:
+    """Chat and search queries; ``web_rate`` of them ask for current information."""
+    rng = random.Random(seed + 1)
+    queries = []
+    for i in range(count):
+        topic = rng.choice(TOPICS)
+        terms = " ".join(rng.sample(VOCABULARY, 2))
+        if rng.random() < web_rate:
+            queries.append(f"what is the latest news about {topic} {terms} ({i})")
+        else:
+            queries.append(f"how does {topic} handle {terms}? ({i})")
+    return queries
@@ -0,0 +1,97 @@
+"""Deterministic local stand-ins for the chat model, web search and embeddings."""
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, List, Optional
+
+import numpy as np
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+WORDS = (
+    "the answer depends on the retrieved context which describes the system in detail "
+    "and the relevant section explains how each component behaves under load"
+).split()
+
+
+def _seed(text: str) -> int:
+    return int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers every prompt with a reply derived from the prompt's hash.
+
+    Latency is ``latency_ms`` plus up to ``jitter_ms`` (also derived from the
+    prompt), so repeated runs see the same delays. ``per_token_ms`` adds a
+    generation cost proportional to the reply length.
+    """
+
+    latency_ms: float = 300.0
+    jitter_ms: float = 50.0
+    per_token_ms: float = 0.0
+    reply_tokens: int = 60
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def _reply(self, messages: List[BaseMessage]):
+        prompt = "".join(str(m.content) for m in messages)
+        rng = random.Random(_seed(prompt))
+        words = [rng.choice(WORDS) for _ in range(self.reply_tokens)]
+        delay = (self.latency_ms + rng.uniform(0, self.jitter_ms) + self.per_token_ms * len(words)) / 1000
+        self.calls += 1
+        return " ".join(words), delay
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text, delay = self._reply(messages)
+        time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        text, delay = self._reply(messages)
+        await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any):
+        text, delay = self._reply(messages)
+        words = text.split(" ")
+        await asyncio.sleep(self.latency_ms / 1000)
+        for word in words:
+            await asyncio.sleep(max(0.0, delay - self.latency_ms / 1000) / len(words))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def hash_embeddings(texts: List[str], dimensions: int = 384) -> np.ndarray:
+    """Bag-of-words hashing vectors; a stand-in when the ONNX model is not available."""
+    vectors = np.zeros((len(texts), dimensions), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.lower().split():
+            vectors[i, _seed(word) % dimensions] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def install(llm_latency_ms: float, llm_jitter_ms: float, web_latency_ms: float, embeddings: str = "onnx"):
+    """Swap the stand-ins into the already imported server modules."""
+    from src.external.llm_client import llm_client
+    from src.external.web_search import StubSearchProvider, web_search_client
+
+    llm = FakeChatModel(latency_ms=llm_latency_ms, jitter_ms=llm_jitter_ms)
+    llm_client.llm = llm
+
+    web = StubSearchProvider(web_latency_ms)
+    web_search_client.provider = web
+    web_search_client.clear()
+
+    if embeddings == "hash":
+        from src.db.vector.embeddings import OnnxEmbeddingFunction
+
+        OnnxEmbeddingFunction._forward = lambda self, texts, kind="query": hash_embeddings(texts)
+    return llm, web
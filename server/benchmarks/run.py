@@ -0,0 +1,244 @@
+"""Offline end-to-end load and latency benchmark.
+
+Runs the FastAPI app in-process against a fresh data directory, with a
+deterministic fake chat model, a stubbed web search and a synthetic corpus,
+so no network or API key is needed. From the server directory:
+
+    python -m benchmarks.run --concurrency 8 --docs 20 --chat-requests 100
+    python -m benchmarks.compare benchmarks/results/a.json benchmarks/results/b.json
+
+Phases run in order (upload, search, documents, chat), each at the given
+concurrency. Reports throughput and p50/p95/p99 latency per endpoint and,
+from the ``timings`` returned by /chat/, per graph node and retrieval source.
+Results are saved as JSON for later comparison, by default under
+benchmarks/results/, which git ignores.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(SERVER_DIR, "benchmarks", "results")
+ENDPOINTS = ("upload", "search", "documents", "chat")
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(latencies_ms: List[float], errors: int = 0, elapsed: float = None) -> Dict:
+    summary = {
+        "count": len(latencies_ms),
+        "errors": errors,
+        "mean_ms": round(sum(latencies_ms) / len(latencies_ms), 2) if latencies_ms else 0.0,
+        "p50_ms": round(percentile(latencies_ms, 50), 2),
+        "p95_ms": round(percentile(latencies_ms, 95), 2),
+        "p99_ms": round(percentile(latencies_ms, 99), 2),
+        "max_ms": round(max(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+    if elapsed is not None:
+        summary["elapsed_seconds"] = round(elapsed, 3)
+        summary["throughput_rps"] = round(len(latencies_ms) / elapsed, 2) if elapsed else 0.0
+    return summary
+
+
+async def drive(calls: List[Callable[[], Awaitable]], concurrency: int):
+    """Run request factories with at most ``concurrency`` in flight.
+
+    Returns (latencies in ms of successful calls, error count, elapsed
+    seconds, responses of successful calls).
+    """
+    queue = list(reversed(calls))
+    latencies, responses = [], []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            call = queue.pop()
+            started = time.perf_counter()
+            try:
+                response = await call()
+                response.raise_for_status()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            responses.append(response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(max(1, concurrency))])
+    return latencies, errors, time.perf_counter() - started, responses
+
+
+async def run_benchmark(args) -> Dict:
+    import httpx
+
+    import server
+    from benchmarks import fakes
+    from benchmarks.corpus import make_corpus, make_queries
+
+    llm, web = fakes.install(args.llm_latency_ms, args.llm_jitter_ms, args.web_latency_ms, args.embeddings)
+    corpus = make_corpus(args.docs, args.doc_size, args.seed)
+    queries = make_queries(max(args.chat_requests, args.search_requests), args.web_rate, args.seed)
+    rng = random.Random(args.seed)
+
+    endpoints, node_latencies, degraded = {}, {}, {}
+    chat_extra = {"latency_budget_ms": args.latency_budget_ms} if args.latency_budget_ms else {}
+    transport = httpx.ASGITransport(app=server.app)
+    async with server.app.router.lifespan_context(server.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            phases = {
+                "upload": [
+                    (lambda name=name, content=content: client.post(
+                        "/upload-document/", files={"file": (name, content, "text/plain")}
+                    ))
+                    for name, content in corpus
+                ],
+                "search": [
+                    (lambda q=q: client.post("/search-documents/", params={"query": q, "k": 10}))
+                    for q in queries[:args.search_requests]
+                ],
+                "documents": [
+                    (lambda offset=rng.randrange(max(1, args.docs)): client.get(
+                        "/documents/", params={"offset": offset, "limit": 50}
+                    ))
+                    for _ in range(args.documents_requests)
+                ],
+                "chat": [
+                    (lambda q=q, i=i: client.post(
+                        "/chat/", json={"message": q, "session_id": f"bench-{i % args.sessions}", **chat_extra}
+                    ))
+                    for i, q in enumerate(queries[:args.chat_requests])
+                ],
+            }
+            for name in args.endpoints:
+                latencies, errors, elapsed, responses = await drive(phases[name], args.concurrency)
+                endpoints[name] = summarize(latencies, errors, elapsed)
+                print(f"{name:<10} done: {len(latencies)} ok, {errors} errors in {elapsed:.2f}s")
+                if name == "chat":
+                    for response in responses:
+                        body = response.json()
+                        for stage, ms in (body.get("timings") or {}).items():
+                            node_latencies.setdefault(stage, []).append(ms)
+                        for stage in body.get("degraded") or []:
+                            degraded[stage] = degraded.get(stage, 0) + 1
+
+    return {
+        "endpoints": endpoints,
+        "nodes": {stage: summarize(values) for stage, values in sorted(node_latencies.items())},
+        # Chat responses that had each stage cut short by the latency budget
+        "degraded": dict(sorted(degraded.items())),
+        "fakes": {"llm_calls": llm.calls, "web_search_calls": web.calls},
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=SERVER_DIR
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_report(result: Dict):
+    header = f"{'':<28}{'count':>7}{'err':>5}{'rps':>9}{'p50':>10}{'p95':>10}{'p99':>10}"
+    print("\n" + header)
+    for section in ("endpoints", "nodes"):
+        for name, s in result[section].items():
+            rps = f"{s['throughput_rps']:.1f}" if "throughput_rps" in s else "-"
+            print(f"{name:<28}{s['count']:>7}{s['errors']:>5}{rps:>9}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}")
+    if result.get("degraded"):
+        print("\ndegraded: " + ", ".join(f"{stage} x{count}" for stage, count in result["degraded"].items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--name", help="Result name; defaults to a timestamp")
+    parser.add_argument("--output", help="Result file; defaults to benchmarks/results/<name>.json")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--docs", type=int, default=20, help="Synthetic documents to upload")
+    parser.add_argument("--doc-size", type=int, default=8000, help="Characters per document")
+    parser.add_argument("--chat-requests", type=int, default=100)
+    parser.add_argument("--search-requests", type=int, default=200)
+    parser.add_argument("--documents-requests", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=10, help="Chat sessions the requests rotate over")
+    parser.add_argument("--web-rate", type=float, default=0.1, help="Share of chat queries that trigger web search")
+    parser.add_argument("--latency-budget-ms", type=float, help="Budget sent with each chat; defaults to the server's")
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-jitter-ms", type=float, default=50)
+    parser.add_argument("--web-latency-ms", type=float, default=100)
+    parser.add_argument("--embeddings", choices=("onnx", "hash"), default="onnx",
+                        help="'hash' replaces the ONNX model when it is not available offline")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache enabled")
+    parser.add_argument("--keep-data", action="store_true", help="Keep the temporary data directory")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    name = args.name or datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = os.path.abspath(args.output or os.path.join(RESULTS_DIR, f"{name}.json"))
+
+    # Settings are read at import time, so they go in before the server is imported
+    os.environ.setdefault("ANSWER_CACHE_ENABLED", "true" if args.answer_cache else "false")
+    os.environ.setdefault("MEMORY_COMPACTION_INTERVAL", "0")
+    # The chat model is faked, but building the client needs a key (llm_client reads API_KEY)
+    os.environ.setdefault("API_KEY", "benchmark")
+
+    # Every store uses paths relative to the working directory
+    workdir = tempfile.mkdtemp(prefix="ragbot-bench-")
+    os.chdir(workdir)
+    sys.path.insert(0, SERVER_DIR)
+
+    try:
+        result = asyncio.run(run_benchmark(args))
+    finally:
+        os.chdir(SERVER_DIR)
+        if args.keep_data:
+            print(f"Data kept in {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+    result = {
+        "name": name,
+        "created": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("name", "output", "keep_data")},
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        **result,
+    }
+    print_report(result)
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    main()
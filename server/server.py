@@ -1,28 +1,106 @@
-from fastapi import FastAPI, File , UploadFile, HTTPException
+from src.utils.boot import boot_report
+from fastapi import FastAPI, File , UploadFile, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
+import asyncio
 import tempfile
-from src.utils.document_processor import extract_text_from_file
+import json
+from contextlib import asynccontextmanager
+from src.utils.document_processor import extract_pages_from_file
 from src.models.schemas import ChatMessage, DocumentInfo, ChatResponse
 from src.utils.text_splitter import text_splitter
-import uuid
-from src.core.agent.graph import agent as graph
+from src.utils.ingestion import (
+    ingest_pages,
+    content_hash,
+    remove_stale_versions,
+    INGEST_BATCH_SIZE,
+    INGEST_WORKERS
+)
+from typing import Optional
+from src.core.agent.graph import get_agent, GRAPH_TOPOLOGY
 from datetime import datetime
 import os
-from src.db.vector.chroma_client import doc_collection,memory_collection
+from src.db.vector.chroma_client import (
+    get_doc_collection, get_memory_collection, supports_multiple_workers, vector_store_location,
+    CHROMA_MODE, CHROMA_DB_PATH, CHAT_HISTORY_COLLECTION, DOCUMENTS_COLLECTION
+)
+from src.db.vector.bulk import delete_where
+from src.db.vector.query_embeddings import query_embedding_cache
+from src.db.vector.embeddings import embedding_function, EMBEDDING_WARMUP
 from src.core.memory.MemoryManager import MemoryManager
+from src.core.memory.compaction import memory_compactor, MEMORY_COMPACTION_INTERVAL
+from src.db.sql.document_catalog import DocumentCatalog
+from src.db.sql.session_index import SessionIndex
+from src.db.sql.lexical_index import LexicalIndex
+from src.db.sql.turn_store import TurnStore
+from src.core.temp.retriver import hybrid_retriever, SEARCH_MODES
+from src.db.sql.corpus_version import CorpusVersion
+from src.core.cache.answer_cache import answer_cache
+from src.external.llm_client import llm_client
 from src.core.agent.state import AgentState
+from src.core.agent.budget import new_deadline, CHAT_LATENCY_BUDGET_MS
+from src.core.agent.context_builder import get_encoding, CONTEXT_TOKEN_BUDGET, HISTORY_TOKEN_SHARE
 from src.core.agent.tools.date_retrieval_tool import date_retrieval_tool
-from src.core.agent.tools.web_search_tool import web_search_tool
+from src.core.agent.tools.web_search_tool import web_search_async
+from src.external.web_search import web_search_client
+from src.utils.concurrency import run_blocking
+from src.utils.process_lock import FileLock
+from src.utils import metrics
+from src.utils.tracing import init_tracing, shutdown_tracing, tracing_stats
+
+
+# Server processes; more than one needs CHROMA_MODE=http
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+
 
 
-CHROMA_DB_PATH = "./chroma_db"
-CHAT_HISTORY_COLLECTION = "chat_history"
-DOCUMENTS_COLLECTION = "documents"
+def open_stores():
+    """Open both Chroma collections, then run the one-time index backfills."""
+    doc_collection = get_doc_collection()
+    memory_collection = get_memory_collection()
+    # One-time index builds for data stored before the catalog/index existed.
+    # Workers take turns; after the first, each finds the indexes filled.
+    with FileLock("backfill"):
+        DocumentCatalog.backfill(doc_collection)
+        SessionIndex.backfill(memory_collection)
+        LexicalIndex.backfill(doc_collection)
+        TurnStore.backfill(memory_collection)
 
 
+def warmup_embeddings():
+    """Load the embedding model before the first request needs it."""
+    try:
+        embedding_function.warmup()
+    except Exception as e:
+        print(f"Embedding warmup failed, model will load on first use: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize heavy resources once, independent ones in parallel."""
+    boot_report.timed("tracing", init_tracing)
+    steps = [
+        ("stores", open_stores),
+        ("llm_client", lambda: llm_client.llm),
+        ("agent_graph", lambda: get_agent(async_mode=True)),
+        ("tokenizer", get_encoding),
+    ]
+    if EMBEDDING_WARMUP:
+        steps.append(("embeddings", warmup_embeddings))
+    with boot_report.step("startup"):
+        await asyncio.gather(*[run_blocking(boot_report.timed, name, func) for name, func in steps])
+    print(boot_report.format())
+    
+    compaction_task = None
+    if MEMORY_COMPACTION_INTERVAL > 0:
+        compaction_task = asyncio.create_task(memory_compactor.run_periodically())
+    yield
+    if compaction_task is not None:
+        compaction_task.cancel()
+    shutdown_tracing()
 
-app = FastAPI(title="RAG-Bot Server", version="1.0.0")
 
+app = FastAPI(title="RAG-Bot Server", version="1.0.0", lifespan=lifespan)
 
 
 # CORS middleware
@@ -33,6 +111,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Request latency histogram and the root span of each request's trace
+app.add_middleware(metrics.MetricsMiddleware)
 
 
 @app.get("/")
@@ -41,8 +121,15 @@ async def root():
     return {"message": "RAG-Bot Server is running", "status": "healthy"}
 
 @app.post("/upload-document/", response_model=DocumentInfo)
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process documents (PDF, DOCX, TXT, XML)."""
+async def upload_document(
+    file: UploadFile = File(...),
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None
+):
+    """Upload and process documents (PDF, DOCX, TXT, XML).
+    
+    ``batch_size`` and ``workers`` override INGEST_BATCH_SIZE and INGEST_WORKERS.
+    """
     
     # Validate file type
     allowed_extensions = ['.pdf', '.docx', '.doc', '.txt', '.xml']
@@ -55,39 +142,52 @@ async def upload_document(file: UploadFile = File(...)):
         )
     
     try:
+        content = await file.read()
+        file_hash = content_hash(content)
+        
+        # Identical re-upload: nothing to extract or embed
+        existing = await run_blocking(DocumentCatalog.get, file.filename)
+        if existing and existing["file_hash"] == file_hash:
+            return DocumentInfo(
+                filename=file.filename,
+                doc_type=file_ext[1:],
+                chunk_count=existing["chunk_count"],
+                upload_time=datetime.fromisoformat(existing["upload_time"]),
+                file_hash=file_hash,
+                deduplicated=True
+            )
+        
         # Save uploaded file temporarily
         with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp_file:
-            content = await file.read()
             tmp_file.write(content)
             tmp_file_path = tmp_file.name
         
-        # Extract text
-        text_content = extract_text_from_file(tmp_file_path, file.filename)
+        # Extract pages, chunk, embed in batches and store in vector database
+        stats = await run_blocking(
+            ingest_pages,
+            extract_pages_from_file(tmp_file_path, file.filename),
+            file.filename,
+            file_ext[1:],  # Remove the dot
+            batch_size=batch_size,
+            workers=workers,
+            file_hash=file_hash
+        )
         
-        # Split into chunks
-        chunks = text_splitter.split_text(text_content)
+        # A changed file replaces its previous version
+        await run_blocking(remove_stale_versions, file.filename, file_hash)
         
-        # Create documents with metadata
-        documents = []
-        metadatas = []
-        ids = []
+        # Invalidates cached answers computed against the old corpus
+        await run_blocking(CorpusVersion.bump)
         
-        for i, chunk in enumerate(chunks):
-            doc_id = f"{file.filename}_{i}_{uuid.uuid4()}"
-            documents.append(chunk)
-            metadatas.append({
-                "filename": file.filename,
-                "chunk_index": i,
-                "upload_time": datetime.now().isoformat(),
-                "file_type": file_ext[1:]  # Remove the dot
-            })
-            ids.append(doc_id)
-        
-        # Store in vector database
-        doc_collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
+        upload_time = datetime.now()
+        await run_blocking(
+            DocumentCatalog.upsert,
+            file.filename,
+            file_ext[1:],
+            file_hash,
+            stats["chunk_count"],
+            len(content),
+            upload_time.isoformat()
         )
         
         # Clean up temp file
@@ -96,74 +196,112 @@ async def upload_document(file: UploadFile = File(...)):
         return DocumentInfo(
             filename=file.filename,
             doc_type=file_ext[1:],
-            chunk_count=len(chunks),
-            upload_time=datetime.now()
+            chunk_count=stats["chunk_count"],
+            upload_time=upload_time,
+            chunks_per_sec=stats["chunks_per_sec"],
+            ingest_seconds=stats["elapsed_seconds"],
+            file_hash=file_hash,
+            embedded_count=stats["embedded_count"]
         )
         
+    except HTTPException:
+        if 'tmp_file_path' in locals():
+            os.unlink(tmp_file_path)
+        raise
     except Exception as e:
         # Clean up temp file if it exists
         if 'tmp_file_path' in locals():
             try:
                 os.unlink(tmp_file_path)
-            except:
+            except OSError:
                 pass
         raise HTTPException(status_code=500, detail=str(e))
 
+async def build_initial_state(message: ChatMessage, deadline: float, streaming: bool = False) -> AgentState:
+    """Load recent history and build the graph input for a chat message.
+    
+    ``deadline`` is when the whole request must be answered; nodes fit their work into it.
+    ``streaming`` marks requests whose tokens are sent as they are generated.
+    """
+    # Last 5 interactions (user + assistant turns) for context
+    chat_history = await run_blocking(MemoryManager.get_session_history, message.session_id, 10)
+    messages = [{"role": turn["role"], "content": turn["content"]} for turn in chat_history]
+    
+    # Add current message
+    messages.append({"role": "user", "content": message.message})
+    
+    return AgentState(
+        messages=messages,
+        session_id=message.session_id,
+        user_query=message.message,
+        context="",
+        response="",
+        tool_calls=[],
+        timings={},
+        retrieved=[],
+        prompt_tokens={},
+        deadline=deadline,
+        degraded=[],
+        streaming=streaming
+    )
+
+def build_sources(final_state: dict) -> list:
+    """Extract sources from tool calls and document retrieval."""
+    sources = []
+    for tool_call in final_state.get("tool_calls", []):
+        sources.append({
+            "type": "tool",
+            "tool_name": tool_call["tool"],
+            "content": tool_call["result"][:200] + "..." if len(tool_call["result"]) > 200 else tool_call["result"]
+        })
+    
+    # Add document sources from context
+    if "Document Context:" in final_state.get("context", ""):
+        sources.append({
+            "type": "document",
+            "content": "Retrieved from uploaded documents"
+        })
+    
+    return sources
+
 @app.post("/chat/", response_model=ChatResponse)
 async def chat(message: ChatMessage):
     """Main chat endpoint with RAG and memory integration."""
+    deadline = new_deadline(message.latency_budget_ms)
     
     try:
-        # Get chat history for context
-        chat_history = MemoryManager.get_session_history(message.session_id)
-        
-        # Prepare messages for the graph
-        messages = []
-        for hist in chat_history[-5:]:  # Last 5 interactions
-            if "User:" in hist["content"] and "Assistant:" in hist["content"]:
-                parts = hist["content"].split("Assistant:", 1)
-                if len(parts) == 2:
-                    user_part = parts[0].replace("User:", "").strip()
-                    assistant_part = parts[1].strip()
-                    messages.extend([
-                        {"role": "user", "content": user_part},
-                        {"role": "assistant", "content": assistant_part}
-                    ])
-        
-        # Add current message
-        messages.append({"role": "user", "content": message.message})
-        
-        # Run the LangGraph workflow
-        initial_state = AgentState(
-            messages=messages,
-            session_id=message.session_id,
-            user_query=message.message,
-            context="",
-            response="",
-            tool_calls=[]
-        )
+        # Near-identical question already answered against this corpus version
+        corpus_version = await run_blocking(CorpusVersion.get)
+        cache_scope = await run_blocking(answer_cache.session_scope, message.session_id)
+        cached = await run_blocking(answer_cache.lookup, message.message, corpus_version, cache_scope)
+        if cached:
+            await run_blocking(
+                MemoryManager.store_interaction,
+                session_id=message.session_id,
+                user_message=message.message,
+                bot_response=cached["response"],
+                user_id=message.user_id
+            )
+            return ChatResponse(
+                response=cached["response"],
+                session_id=message.session_id,
+                sources=cached["sources"],
+                timestamp=datetime.now(),
+                cached=True
+            )
         
-        # Execute the graph
-        final_state = graph.invoke(initial_state)
+        initial_state = await build_initial_state(message, deadline)
         
-        # Extract sources from tool calls and document retrieval
-        sources = []
-        for tool_call in final_state.get("tool_calls", []):
-            sources.append({
-                "type": "tool",
-                "tool_name": tool_call["tool"],
-                "content": tool_call["result"][:200] + "..." if len(tool_call["result"]) > 200 else tool_call["result"]
-            })
+        # Execute the graph without blocking the event loop
+        final_state = await get_agent(async_mode=True).ainvoke(initial_state)
         
-        # Add document sources from context
-        if "Document Context:" in final_state.get("context", ""):
-            sources.append({
-                "type": "document",
-                "content": "Retrieved from uploaded documents"
-            })
+        sources = build_sources(final_state)
+        if is_cacheable(final_state):
+            await run_blocking(answer_cache.store, message.message, final_state["response"], sources, corpus_version, cache_scope)
         
         # Store interaction in memory
-        MemoryManager.store_interaction(
+        await run_blocking(
+            MemoryManager.store_interaction,
             session_id=message.session_id,
             user_message=message.message,
             bot_response=final_state["response"],
@@ -174,17 +312,130 @@ async def chat(message: ChatMessage):
             response=final_state["response"],
             session_id=message.session_id,
             sources=sources,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            timings=final_state.get("timings", {}),
+            prompt_tokens=final_state.get("prompt_tokens") or None,
+            degraded=final_state.get("degraded") or None
         )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
+def is_cacheable(final_state: dict) -> bool:
+    """Only complete, successful answers go into the answer cache."""
+    if final_state.get("degraded"):
+        return False
+    return not final_state["response"].startswith("Error generating response")
+
+def sse_event(event: str, data: dict) -> str:
+    """Format one server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def progress_payload(node: str, update: dict) -> dict:
+    """Summarize a graph node update for a progress event."""
+    payload = {"node": node}
+    if node == "retriveal":
+        payload["timings"] = update.get("timings", {})
+    if node == "reasoning" and update.get("prompt_tokens"):
+        payload["prompt_tokens"] = update["prompt_tokens"]
+    if node in ("retriveal", "tool_execution") and update.get("tool_calls"):
+        payload["tools"] = [call["tool"] for call in update["tool_calls"]]
+    if update.get("degraded"):
+        payload["degraded"] = update["degraded"]
+    return payload
+
+@app.post("/chat/stream")
+async def chat_stream(message: ChatMessage):
+    """Chat endpoint that streams the answer as server-sent events.
+    
+    Events: ``progress`` after each graph node, ``token`` for every LLM token
+    (tagged with the node producing it; a new node means the answer is being
+    rewritten), ``sources`` with the final sources and ``done`` with the full
+    response. Failures are reported as an ``error`` event.
+    """
+    deadline = new_deadline(message.latency_budget_ms)
+    try:
+        corpus_version = await run_blocking(CorpusVersion.get)
+        cache_scope = await run_blocking(answer_cache.session_scope, message.session_id)
+        cached = await run_blocking(answer_cache.lookup, message.message, corpus_version, cache_scope)
+        initial_state = None if cached else await build_initial_state(message, deadline, streaming=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
+    
+    async def cached_stream():
+        yield sse_event("progress", {"node": "answer_cache"})
+        yield sse_event("token", {"node": "answer_cache", "content": cached["response"]})
+        yield sse_event("sources", {"sources": cached["sources"]})
+        try:
+            await run_blocking(
+                MemoryManager.store_interaction,
+                session_id=message.session_id,
+                user_message=message.message,
+                bot_response=cached["response"],
+                user_id=message.user_id
+            )
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat processing failed: {str(e)}"})
+            return
+        yield sse_event("done", {
+            "response": cached["response"],
+            "session_id": message.session_id,
+            "timestamp": datetime.now().isoformat(),
+            "cached": True
+        })
+    
+    async def event_stream():
+        final_state = dict(initial_state)
+        try:
+            async for mode, chunk in get_agent(async_mode=True).astream(initial_state, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    token, metadata = chunk
+                    if token.content:
+                        yield sse_event("token", {
+                            "node": metadata.get("langgraph_node"),
+                            "content": token.content
+                        })
+                else:
+                    for node, update in chunk.items():
+                        final_state.update(update or {})
+                        yield sse_event("progress", progress_payload(node, update or {}))
+            
+            sources = build_sources(final_state)
+            yield sse_event("sources", {"sources": sources})
+            if is_cacheable(final_state):
+                await run_blocking(answer_cache.store, message.message, final_state["response"], sources, corpus_version, cache_scope)
+            
+            # Store interaction once the answer is complete
+            await run_blocking(
+                MemoryManager.store_interaction,
+                session_id=message.session_id,
+                user_message=message.message,
+                bot_response=final_state["response"],
+                user_id=message.user_id
+            )
+            
+            yield sse_event("done", {
+                "response": final_state["response"],
+                "session_id": message.session_id,
+                "timestamp": datetime.now().isoformat(),
+                "timings": final_state.get("timings", {}),
+                "prompt_tokens": final_state.get("prompt_tokens", {}),
+                "degraded": final_state.get("degraded", [])
+            })
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat processing failed: {str(e)}"})
+    
+    return StreamingResponse(
+        cached_stream() if cached else event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/chat-history/{session_id}")
-async def get_chat_history(session_id: str):
-    """Get chat history for a session."""
+async def get_chat_history(session_id: str, limit: int = 20):
+    """Get the most recent turns of a session, oldest first."""
     try:
-        history = MemoryManager.get_session_history(session_id)
+        history = await run_blocking(MemoryManager.get_session_history, session_id, limit)
         return {"session_id": session_id, "history": history}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -193,43 +444,37 @@ async def get_chat_history(session_id: str):
 async def clear_chat_history(session_id: str):
     """Clear chat history for a session."""
     try:
-        # Delete from memory collection
-        # ChromaDB doesn't have a direct delete by metadata, so we need to query first
-        results = memory_collection.query(
-            query_texts=[""],
-            n_results=1000,
-            where={"session_id": session_id}
-        )
-        
-        if results['ids']:
-            memory_collection.delete(ids=results['ids'][0])
+        deleted = await run_blocking(MemoryManager.delete_session, session_id)
         
-        return {"message": f"Chat history cleared for session {session_id}"}
+        return {
+            "message": f"Chat history cleared for session {session_id}",
+            **deleted
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/memory/compact")
+async def compact_memory():
+    """Run one memory compaction pass now instead of waiting for the background job."""
+    try:
+        return await memory_compactor.arun_once()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/documents/")
-async def list_documents():
-    """List all uploaded documents."""
+async def list_documents(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    file_type: Optional[str] = None,
+    q: Optional[str] = None
+):
+    """List uploaded documents from the catalog, paginated.
+    
+    ``file_type`` filters by extension and ``q`` by filename substring.
+    """
     try:
-        # Get all documents
-        results = doc_collection.get()
-        
-        # Group by filename
-        documents = {}
-        if results['metadatas']:
-            for metadata in results['metadatas']:
-                filename = metadata.get('filename', 'Unknown')
-                if filename not in documents:
-                    documents[filename] = {
-                        "filename": filename,
-                        "file_type": metadata.get('file_type', 'unknown'),
-                        "upload_time": metadata.get('upload_time'),
-                        "chunk_count": 0
-                    }
-                documents[filename]["chunk_count"] += 1
-        
-        return {"documents": list(documents.values())}
+        documents, total = await run_blocking(DocumentCatalog.list, offset, limit, file_type, q)
+        return {"documents": documents, "total": total, "offset": offset, "limit": limit}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -237,58 +482,59 @@ async def list_documents():
 async def delete_document(filename: str):
     """Delete a specific document and all its chunks."""
     try:
-        # Query for document chunks
-        results = doc_collection.query(
-            query_texts=[""],
-            n_results=1000,
-            where={"filename": filename}
-        )
-        
-        if results['ids'] and results['ids'][0]:
-            doc_collection.delete(ids=results['ids'][0])
-            return {"message": f"Document {filename} deleted successfully"}
-        else:
+        deleted_chunks = await run_blocking(delete_where, get_doc_collection(), {"filename": filename})
+        if not deleted_chunks:
             raise HTTPException(status_code=404, detail="Document not found")
+        
+        await run_blocking(LexicalIndex.delete_filename, filename)
+        await run_blocking(CorpusVersion.bump)
+        await run_blocking(DocumentCatalog.remove, filename)
+        return {
+            "message": f"Document {filename} deleted successfully",
+            "deleted_chunks": deleted_chunks
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/search-documents/")
-async def search_documents(query: str):
-    """Search through uploaded documents."""
+async def search_documents(query: str, mode: str = "auto", k: int = Query(10, ge=1, le=100)):
+    """Search through uploaded documents.
+    
+    ``mode`` is one of auto, hybrid, vector or lexical. ``auto`` answers
+    identifier-like queries from the BM25 index alone and fuses BM25 with
+    vector search otherwise.
+    """
+    if mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"Unsupported mode. Allowed: {list(SEARCH_MODES)}")
     try:
-        results = doc_collection.query(
-            query_texts=[query],
-            n_results=10
-        )
+        hits = await run_blocking(hybrid_retriever.search, query, k, mode)
         
         search_results = []
-        if results['documents'] and results['documents'][0]:
-            for doc, metadata in zip(results['documents'][0], results['metadatas'][0]):
-                search_results.append({
-                    "content": doc,
-                    "filename": metadata.get('filename'),
-                    "chunk_index": metadata.get('chunk_index'),
-                    "relevance_score": "N/A"  # ChromaDB doesn't return scores directly
-                })
+        for hit in hits:
+            search_results.append({
+                "content": hit["content"],
+                "filename": hit["metadata"].get('filename'),
+                "chunk_index": hit["metadata"].get('chunk_index'),
+                "relevance_score": round(hit["score"], 6),  # reciprocal rank fusion score
+                "matched_by": hit["matched_by"]
+            })
         
-        return {"query": query, "results": search_results}
+        return {"query": query, "mode": mode, "results": search_results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/sessions/")
-async def list_sessions():
-    """List all chat sessions."""
+async def list_sessions(
+    offset: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    user_id: Optional[str] = None
+):
+    """List chat sessions from the session index, most recent first."""
     try:
-        results = memory_collection.get()
-        
-        sessions = set()
-        if results['metadatas']:
-            for metadata in results['metadatas']:
-                session_id = metadata.get('session_id')
-                if session_id:
-                    sessions.add(session_id)
-        
-        return {"sessions": list(sessions)}
+        sessions, total = await run_blocking(SessionIndex.list, offset, limit, user_id)
+        return {"sessions": sessions, "total": total, "offset": offset, "limit": limit}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -297,13 +543,24 @@ async def health_check():
     """Detailed health check."""
     try:
         # Check database connections
-        doc_count = doc_collection.count()
-        memory_count = memory_collection.count()
+        doc_count = get_doc_collection().count()
+        memory_count = get_memory_collection().count()
         
         return {
             "status": "healthy",
             "document_count": doc_count,
             "memory_count": memory_count,
+            "corpus": DocumentCatalog.stats(),
+            "corpus_version": CorpusVersion.get(),
+            "answer_cache": answer_cache.stats(),
+            "llm_client": llm_client.stats(),
+            "web_search": web_search_client.stats(),
+            "query_embedding_cache": query_embedding_cache.stats(),
+            "embeddings": embedding_function.stats(),
+            "memory_compaction": memory_compactor.stats(),
+            "boot": boot_report.summary(),
+            "worker_pid": os.getpid(),
+            "tracing": tracing_stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -313,17 +570,34 @@ async def health_check():
             "timestamp": datetime.now().isoformat()
         }
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus scrape endpoint.
+    
+    Values are per worker process and a request reaches whichever worker
+    accepts it, so with SERVER_WORKERS > 1 one scrape sees one worker's
+    numbers. Scrape each worker separately (e.g. one port per worker
+    behind the balancer) and aggregate in Prometheus.
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Tool testing endpoints
 @app.get("/test-web-search/")
 async def test_web_search(query: str):
-    """Test web search functionality."""
-    result = web_search_tool(query)
-    return {"query": query, "result": result}
+    """Test web search functionality, with the cache and circuit breaker state after the call."""
+    started = datetime.now()
+    result = await web_search_async(query)
+    return {
+        "query": query,
+        "result": result,
+        "elapsed_ms": round((datetime.now() - started).total_seconds() * 1000, 1),
+        "web_search": web_search_client.stats()
+    }
 
 @app.get("/test-date-tool/")
 async def test_date_tool(date_string: str = "today"):
     """Test date retrieval functionality."""
-    result = date_retrieval_tool(date_string)
+    result = date_retrieval_tool.invoke(date_string)
     return {"input": date_string, "result": result}
 
 # Configuration endpoints
@@ -331,21 +605,43 @@ async def test_date_tool(date_string: str = "today"):
 async def get_config():
     """Get current configuration."""
     return {
-        "chroma_db_path": CHROMA_DB_PATH,
+        "chroma_mode": CHROMA_MODE,
+        "chroma_location": vector_store_location(),
         "collections": {
             "documents": DOCUMENTS_COLLECTION,
             "chat_history": CHAT_HISTORY_COLLECTION
         },
         "supported_formats": ["pdf", "docx", "doc", "txt", "xml"],
+        "graph_topology": GRAPH_TOPOLOGY,
+        "server_workers": SERVER_WORKERS,
+        "web_search_provider": web_search_client.provider.name,
+        "corpus": DocumentCatalog.stats(),
         "chunk_size": text_splitter._chunk_size,
-        "chunk_overlap": text_splitter._chunk_overlap
+        "chunk_overlap": text_splitter._chunk_overlap,
+        "ingest_batch_size": INGEST_BATCH_SIZE,
+        "ingest_workers": INGEST_WORKERS,
+        "context_token_budget": CONTEXT_TOKEN_BUDGET,
+        "history_token_share": HISTORY_TOKEN_SHARE,
+        "chat_latency_budget_ms": CHAT_LATENCY_BUDGET_MS,
+        "embeddings": {
+            "model_dir": embedding_function.model_dir,
+            "threads": embedding_function.threads,
+            "ingest_threads": embedding_function.ingest_threads,
+            "quantized": embedding_function.quantize,
+            "max_batch": embedding_function.max_batch,
+            "batch_wait_ms": embedding_function.batch_wait_ms
+        }
     }
 
+# Time from the first server import to here; startup steps are added by lifespan
+boot_report.record("import", boot_report.elapsed())
+
 if __name__ == "__main__":
     import uvicorn
     
     # Ensure directories exist
-    os.makedirs(CHROMA_DB_PATH, exist_ok=True)
+    if CHROMA_MODE == "embedded":
+        os.makedirs(CHROMA_DB_PATH, exist_ok=True)
     
     print("Starting RAG-Bot Server...")
     print(f"Documents collection: {DOCUMENTS_COLLECTION}")
@@ -353,11 +649,18 @@ if __name__ == "__main__":
     print("Supported formats: PDF, DOCX, TXT, XML")
     print("Features: Document upload, Chat with memory, Web search, Date tools")
     
+    workers = SERVER_WORKERS
+    if workers > 1 and not supports_multiple_workers():
+        print("SERVER_WORKERS > 1 needs CHROMA_MODE=http (the embedded vector store allows one process); starting one worker")
+        workers = 1
+    print(f"Workers: {workers}, vector store: {CHROMA_MODE} ({vector_store_location()})")
+    
     uvicorn.run(
-        app,
+        # Each worker imports the app itself, so more than one needs the import string
+        "server:app" if workers > 1 else app,
         host="0.0.0.0",
         port=8000,
-        
+        workers=workers
     )
 
 
@@ -0,0 +1,48 @@
+import math
+import os
+import time
+from typing import List, Optional
+
+from src.utils.metrics import DEGRADED_STAGES
+
+# End-to-end time a chat may take; ChatMessage.latency_budget_ms overrides it
+CHAT_LATENCY_BUDGET_MS = float(os.getenv("CHAT_LATENCY_BUDGET_MS", "15000"))
+# Held back from retrieval and tools so the reasoning call still has time
+REASONING_RESERVE_MS = float(os.getenv("REASONING_RESERVE_MS", "5000"))
+# With less than this left, reasoning answers from the retrieved context without the LLM
+REASONING_MIN_MS = float(os.getenv("REASONING_MIN_MS", "500"))
+# With less than this left, final_response keeps the first answer instead of rewriting it
+FINAL_RESPONSE_MIN_MS = float(os.getenv("FINAL_RESPONSE_MIN_MS", "3000"))
+
+
+def new_deadline(budget_ms: Optional[float] = None) -> float:
+    """The ``time.monotonic()`` value by which a request started now must be answered."""
+    return time.monotonic() + (budget_ms or CHAT_LATENCY_BUDGET_MS) / 1000
+
+
+def remaining(state) -> float:
+    """Seconds left in the request's budget; unbounded for states without a deadline."""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return math.inf
+    return deadline - time.monotonic()
+
+
+def stage_timeout(state, cap: float, reserve_ms: float = 0) -> float:
+    """Seconds a stage may take: at most ``cap``, leaving ``reserve_ms`` for later stages.
+    
+    The reserve is capped at half of what is left, so a small budget is split
+    between stages instead of starving the earlier one.
+    """
+    left = remaining(state)
+    return min(cap, left - min(reserve_ms / 1000, left / 2))
+
+
+def degrade(state, *stages: str) -> List[str]:
+    """The state's degraded stages plus ``stages``, each listed once."""
+    degraded = list(state.get("degraded") or [])
+    for stage in stages:
+        if stage not in degraded:
+            degraded.append(stage)
+            DEGRADED_STAGES.inc(stage=stage)
+    return degraded
@@ -0,0 +1,218 @@
+import math
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from src.external.llm_client import LLM_MODEL
+
+# Whole reasoning prompt, in tokens of the chat model's tokenizer
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+# Most of what is left after the template, query and tool results that
+# recent history may take; retrieved chunks get the rest
+HISTORY_TOKEN_SHARE = float(os.getenv("HISTORY_TOKEN_SHARE", "0.3"))
+# A chunk is cut to fit only if at least this many tokens are left for it
+CONTEXT_MIN_CHUNK_TOKENS = int(os.getenv("CONTEXT_MIN_CHUNK_TOKENS", "48"))
+# Shorter suffix/prefix matches between adjacent chunks are treated as chance
+MIN_OVERLAP_CHARS = 20
+
+_encoding = None
+_encoding_failed = False
+_encoding_lock = threading.Lock()
+
+
+def get_encoding():
+    """tiktoken encoding for LLM_MODEL, or None if it cannot be loaded.
+
+    tiktoken downloads its BPE files on first use; without network access
+    token counts fall back to a characters/4 estimate.
+    """
+    global _encoding, _encoding_failed
+    if _encoding is None and not _encoding_failed:
+        with _encoding_lock:
+            if _encoding is None and not _encoding_failed:
+                try:
+                    import tiktoken
+
+                    try:
+                        _encoding = tiktoken.encoding_for_model(LLM_MODEL)
+                    except KeyError:
+                        _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    _encoding_failed = True
+                    print(f"Failed to load tiktoken encoding, estimating token counts: {e}")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to ``max_tokens``, backing off to a sentence or line end."""
+    encoding = get_encoding()
+    if encoding is None:
+        cut = text[:max_tokens * 4]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    if len(cut) >= len(text):
+        return text
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + "..."
+
+
+def overlap_length(previous: str, following: str, min_chars: int = MIN_OVERLAP_CHARS) -> int:
+    """Length of the longest suffix of ``previous`` that starts ``following``."""
+    for size in range(min(len(previous), len(following)), min_chars - 1, -1):
+        if previous.endswith(following[:size]):
+            return size
+    return 0
+
+
+def dedupe_chunks(chunks: List[Dict]) -> List[Dict]:
+    """Drop repeated chunk text and trim the text adjacent chunks share.
+
+    The splitter overlaps neighbouring chunks of a file; when both are
+    retrieved, the shared text is kept only once. Order is preserved.
+    """
+    seen = set()
+    unique = []
+    for chunk in chunks:
+        key = " ".join(chunk["content"].split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(dict(chunk))
+
+    by_position = {}
+    for chunk in unique:
+        metadata = chunk.get("metadata") or {}
+        if "chunk_index" in metadata:
+            by_position[(metadata.get("filename"), metadata["chunk_index"])] = chunk
+    for (filename, index), chunk in sorted(by_position.items(), key=lambda item: (str(item[0][0]), item[0][1])):
+        previous = by_position.get((filename, index - 1))
+        if previous is None:
+            continue
+        size = overlap_length(previous["content"], chunk["content"])
+        # The less relevant chunk gives up the shared text, so it survives
+        # in the one more likely to be kept within budget
+        if size and relevance(previous) >= relevance(chunk):
+            chunk["content"] = chunk["content"][size:].lstrip()
+        elif size:
+            previous["content"] = previous["content"][:-size].rstrip()
+    return [chunk for chunk in unique if chunk["content"].strip()]
+
+
+def relevance(chunk: Dict) -> float:
+    """Relevance in [0, 1] comparable across documents and memories."""
+    if chunk.get("reranker") == "cross_encoder":
+        return 1 / (1 + math.exp(-chunk["rerank_score"]))
+    if "rerank_score" in chunk:
+        return max(0.0, min(1.0, chunk["rerank_score"]))
+    if chunk.get("distance") is not None:
+        return max(0.0, 1.0 - chunk["distance"])
+    return 0.0
+
+
+def fit_chunks(chunks: List[Dict], budget: int) -> Tuple[List[Dict], int]:
+    """Most relevant chunks first, whole while they fit.
+
+    The first chunk that does not fit is cut to the remaining budget if
+    enough is left for it to be useful; everything after it is dropped.
+    Returns the selected chunks (with ``tokens``) and the tokens used.
+    """
+    selected = []
+    used = 0
+    for chunk in sorted(chunks, key=relevance, reverse=True):
+        tokens = count_tokens(chunk["content"])
+        remaining = budget - used
+        if tokens <= remaining:
+            selected.append({**chunk, "tokens": tokens})
+            used += tokens
+            continue
+        if remaining >= CONTEXT_MIN_CHUNK_TOKENS:
+            content = truncate_tokens(chunk["content"], remaining)
+            tokens = count_tokens(content)
+            selected.append({**chunk, "content": content, "tokens": tokens, "truncated": True})
+            used += tokens
+        break
+    return selected, used
+
+
+def fit_history(messages: List[Dict], budget: int) -> Tuple[List[str], int]:
+    """Newest whole messages that fit the budget, returned oldest first."""
+    lines = []
+    used = 0
+    for message in reversed(messages):
+        line = f"{message['role']}: {message['content']}"
+        tokens = count_tokens(line) + 1
+        if used + tokens > budget:
+            break
+        lines.append(line)
+        used += tokens
+    return list(reversed(lines)), used
+
+
+def build_context(
+    query: str,
+    retrieved: List[Dict],
+    messages: List[Dict],
+    reserved_tokens: int,
+    budget: int = CONTEXT_TOKEN_BUDGET,
+    history_share: float = HISTORY_TOKEN_SHARE,
+    max_history_messages: Optional[int] = 5
+) -> Dict:
+    """Fit history and retrieved chunks into what ``reserved_tokens`` leaves of ``budget``.
+
+    ``retrieved`` items carry ``source`` ("documents" or "memory"),
+    ``content``, ``metadata`` and a score (``rerank_score`` or ``distance``).
+    ``messages`` may end with the current query, which is not repeated.
+    Memories already present in the history are skipped. Returns the
+    rendered ``documents``, ``memory`` and ``history`` sections and a
+    ``tokens`` breakdown.
+    """
+    history = list(messages)
+    if history and history[-1].get("role") == "user" and history[-1].get("content") == query:
+        history = history[:-1]
+    if max_history_messages is not None:
+        history = history[-max_history_messages:]
+
+    available = max(0, budget - reserved_tokens)
+    history_lines, history_tokens = fit_history(history, int(available * history_share))
+
+    history_text = "\n".join(history_lines)
+    candidates = [
+        chunk for chunk in retrieved
+        if chunk.get("source") != "memory" or not _already_in_history(chunk["content"], history_text)
+    ]
+    selected, chunk_tokens = fit_chunks(dedupe_chunks(candidates), available - history_tokens)
+
+    documents = [c for c in selected if c.get("source") == "documents"]
+    memories = [c for c in selected if c.get("source") == "memory"]
+    return {
+        "documents": "\n".join(
+            f"From {(c.get('metadata') or {}).get('filename', 'Unknown')}: {c['content']}" for c in documents
+        ),
+        "memory": "\n".join(c["content"] for c in memories),
+        "history": history_text,
+        "tokens": {
+            "budget": budget,
+            "reserved": reserved_tokens,
+            "history": history_tokens,
+            "documents": sum(c["tokens"] for c in documents),
+            "memory": sum(c["tokens"] for c in memories),
+            "chunks_used": len(selected),
+            "chunks_dropped": len(retrieved) - len(selected),
+        }
+    }
+
+
+def _already_in_history(memory: str, history_text: str) -> bool:
+    # Memories are stored as "User: ...\nAssistant: ..."
+    user_part = memory.split("\nAssistant:", 1)[0].replace("User:", "", 1).strip()
+    return bool(user_part) and f"user: {user_part}" in history_text
@@ -1,29 +1,129 @@
-from src.core.agent.nodes.final_response_node import final_response_node
-from src.core.agent.nodes.retrival_node import retrieval_node
-from src.core.agent.nodes.reasoning_node import reasoning_node
-from src.core.agent.nodes.tool_execution_node import tool_execution_node
+import functools
+import inspect
+import os
+import time
+
+from src.core.agent.nodes.final_response_node import final_response_node, final_response_node_async
+from src.core.agent.nodes.retrival_node import (
+    retrieval_node,
+    retrieval_node_async,
+    retrieval_with_tools_node,
+    retrieval_with_tools_node_async
+)
+from src.core.agent.nodes.reasoning_node import reasoning_node, reasoning_node_async
+from src.core.agent.nodes.tool_execution_node import tool_execution_node, tool_execution_node_async
 
 from src.core.agent.state import AgentState
+from src.utils.metrics import NODE_DURATION, timed
 
 from langgraph.graph import StateGraph, END 
 
 
-graph = StateGraph(AgentState)
+# "single_call": retrieval and tools run together, then one reasoning call.
+# "classic": retrieval -> reasoning -> tool_execution -> final_response, which
+# costs a second LLM call whenever a tool fires. Kept for comparison.
+GRAPH_TOPOLOGY = os.getenv("GRAPH_TOPOLOGY", "single_call")
+TOPOLOGIES = ("single_call", "classic")
+
+
+def _with_timing(name: str, result: dict, started: float) -> dict:
+    timings = dict(result.get("timings") or {})
+    timings[f"node.{name}"] = round((time.perf_counter() - started) * 1000, 1)
+    return {**result, "timings": timings}
+
+
+def timed_node(name: str, node):
+    """Wrap a sync or async node so it records its duration as ``timings["node.<name>"]``.
+    
+    The duration also goes to the node latency histogram, under a span per node.
+    """
+    if inspect.iscoroutinefunction(node):
+        @functools.wraps(node)
+        async def timed_async(state: AgentState):
+            started = time.perf_counter()
+            with timed(NODE_DURATION, f"node.{name}", node=name):
+                result = await node(state)
+            return _with_timing(name, result, started)
+        return timed_async
+    
+    @functools.wraps(node)
+    def timed_sync(state: AgentState):
+        started = time.perf_counter()
+        with timed(NODE_DURATION, f"node.{name}", node=name):
+            result = node(state)
+        return _with_timing(name, result, started)
+    return timed_sync
+
+
+def build_classic_graph(retrieval, reasoning, tool_execution, final_response):
+    """Wire the agent nodes into the original four-step StateGraph."""
+    graph = StateGraph(AgentState)
+    
+    #nodes->
+    graph.add_node("retriveal",timed_node("retriveal", retrieval))
+    graph.add_node("reasoning",timed_node("reasoning", reasoning))
+    graph.add_node("tool_execution",timed_node("tool_execution", tool_execution))
+    graph.add_node("final_response",timed_node("final_response", final_response))
+    
+    #edges(connecting nodes)->
+    graph.set_entry_point("retriveal")
+    graph.add_edge("retriveal","reasoning")
+    graph.add_edge("reasoning","tool_execution")
+    graph.add_edge("tool_execution","final_response")
+    graph.add_edge("final_response",END)
+    
+    return graph
+
+
+def build_single_call_graph(retrieval_with_tools, reasoning):
+    """Wire a graph where tools run alongside retrieval before one reasoning call."""
+    graph = StateGraph(AgentState)
+    
+    graph.add_node("retriveal",timed_node("retriveal", retrieval_with_tools))
+    graph.add_node("reasoning",timed_node("reasoning", reasoning))
+    
+    graph.set_entry_point("retriveal")
+    graph.add_edge("retriveal","reasoning")
+    graph.add_edge("reasoning",END)
+    
+    return graph
 
-#nodes->
-graph.add_node("retriveal",retrieval_node)
-graph.add_node("reasoning",reasoning_node)
-graph.add_node("tool_execution",tool_execution_node)
-graph.add_node("final_response",final_response_node)
 
-#edges(connecting nodes)->
-graph.set_entry_point("retriveal")
-graph.add_edge("retriveal","reasoning")
-graph.add_edge("reasoning","tool_execution")
-graph.add_edge("tool_execution","final_response")
-graph.add_edge("final_response",END)
+def build_agent(topology: str = GRAPH_TOPOLOGY, async_mode: bool = False):
+    """Compile the agent graph for a topology, with sync or async nodes."""
+    if topology not in TOPOLOGIES:
+        raise ValueError(f"Unknown graph topology: {topology}. Allowed: {TOPOLOGIES}")
+    
+    if topology == "single_call":
+        if async_mode:
+            return build_single_call_graph(retrieval_with_tools_node_async, reasoning_node_async).compile()
+        return build_single_call_graph(retrieval_with_tools_node, reasoning_node).compile()
+    
+    if async_mode:
+        return build_classic_graph(
+            retrieval_node_async,
+            reasoning_node_async,
+            tool_execution_node_async,
+            final_response_node_async
+        ).compile()
+    return build_classic_graph(
+        retrieval_node,
+        reasoning_node,
+        tool_execution_node,
+        final_response_node
+    ).compile()
 
 
-agent = graph.compile()
+@functools.lru_cache(maxsize=None)
+def get_agent(async_mode: bool = False, topology: str = GRAPH_TOPOLOGY):
+    """Compiled graph, built once on first use (normally during server startup)."""
+    return build_agent(topology, async_mode=async_mode)
 
 
+def __getattr__(name):
+    # `agent` (driven by invoke) and `async_agent` (driven by ainvoke) stay importable
+    if name == "agent":
+        return get_agent()
+    if name == "async_agent":
+        return get_agent(async_mode=True)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
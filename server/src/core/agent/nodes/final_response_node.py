@@ -1,21 +1,19 @@
+import asyncio
+
+from src.core.agent import budget
 from src.core.agent.state import AgentState
-from src.external.llm_client import llm
+from src.external.llm_client import llm_client
 
 
 
-def final_response_node(state: AgentState):
-    """Generate final response incorporating tool results."""
-    original_response = state["response"]
-    tool_calls = state["tool_calls"]
+def build_final_prompt(original_response: str, tool_calls) -> str:
+    """Build the enhancement prompt that folds tool results into the response."""
+    tool_context = "\n".join([
+        f"Tool {call['tool']}: {call['result']}" 
+        for call in tool_calls
+    ])
     
-    if tool_calls:
-        # Enhance response with tool results
-        tool_context = "\n".join([
-            f"Tool {call['tool']}: {call['result']}" 
-            for call in tool_calls
-        ])
-        
-        enhanced_prompt = f"""
+    return f"""
         Original response: {original_response}
         
         Additional tool results:
@@ -23,13 +21,45 @@ def final_response_node(state: AgentState):
         
         Please provide a final comprehensive response incorporating all available information.
         """
+
+
+def without_enhancement(state: AgentState):
+    """Keep the first answer and list the tool results under it; used when time is short."""
+    tool_context = "\n".join([
+        f"- {call['tool']}: {call['result']}"
+        for call in state["tool_calls"] if not call.get("degraded")
+    ])
+    response = f"{state['response']}\n\nTool results:\n{tool_context}" if tool_context else state["response"]
+    return {
+        **state,
+        "response": response,
+        "degraded": budget.degrade(state, "final_response")
+    }
+
+
+def _enough_time(state: AgentState) -> bool:
+    return budget.remaining(state) * 1000 >= budget.FINAL_RESPONSE_MIN_MS
+
+
+def final_response_node(state: AgentState):
+    """Generate final response incorporating tool results."""
+    original_response = state["response"]
+    tool_calls = state["tool_calls"]
+    
+    if tool_calls:
+        if not _enough_time(state):
+            return without_enhancement(state)
+        # Enhance response with tool results
+        enhanced_prompt = build_final_prompt(original_response, tool_calls)
         
         try:
-            final_response = llm.invoke(enhanced_prompt)
+            final_response = llm_client.invoke(enhanced_prompt, deadline=state.get("deadline"))
             return {
                 **state,
                 "response": final_response.content
             }
+        except (asyncio.TimeoutError, TimeoutError):
+            return without_enhancement(state)
         except Exception as e:
             return {
                 **state,
@@ -39,3 +69,30 @@ def final_response_node(state: AgentState):
     return state
 
 
+async def final_response_node_async(state: AgentState):
+    """Async variant of final_response_node using llm_client.ainvoke."""
+    original_response = state["response"]
+    tool_calls = state["tool_calls"]
+    
+    if tool_calls:
+        if not _enough_time(state):
+            return without_enhancement(state)
+        enhanced_prompt = build_final_prompt(original_response, tool_calls)
+        
+        try:
+            final_response = await llm_client.ainvoke(
+                enhanced_prompt, deadline=state.get("deadline"), coalesce=not state.get("streaming")
+            )
+            return {
+                **state,
+                "response": final_response.content
+            }
+        except (asyncio.TimeoutError, TimeoutError):
+            return without_enhancement(state)
+        except Exception as e:
+            return {
+                **state,
+                "response": f"{original_response}\n\nNote: Tool enhancement failed: {str(e)}"
+            }
+    
+    return state
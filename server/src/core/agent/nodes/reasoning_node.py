@@ -1,45 +1,131 @@
+import asyncio
+from typing import Dict, Tuple
+
+from src.core.agent import budget
+from src.core.agent.context_builder import build_context, count_tokens
 from src.core.agent.state import AgentState
-from src.external.llm_client import llm
+from src.external.llm_client import llm_client
 
 
-def reasoning_node(state: AgentState):
-    """Main reasoning and response generation."""
-    query = state["user_query"]
-    context = state["context"]
-    messages = state["messages"]
-    
-    # Prepare chat history for context
-    chat_context = "\n".join([
-        f"{msg['role']}: {msg['content']}" 
-        for msg in messages[-5:]  # Last 5 messages
-    ])
-    
-    # Create prompt
-    prompt = f"""
+PROMPT_TEMPLATE = """
     You are a helpful AI assistant with access to uploaded documents and chat history.
     
     User Query: {query}
     
     Retrieved Context:
-    {context}
+    Document Context:
+    {documents}
     
-    Recent Chat History:
-    {chat_context}
+    Memory Context:
+    {memory}
     
+    Recent Chat History:
+    {history}
+    {tool_section}
     Please provide a comprehensive response based on the available context and your knowledge.
-    If you need additional current information, you can use tools.
     """
+
+
+def build_reasoning_prompt(state: AgentState) -> Tuple[str, Dict[str, int]]:
+    """Build the reasoning prompt within the context token budget.
+    
+    Returns the prompt and its token counts by section.
+    """
+    query = state["user_query"]
+    
+    # Tool results are already present when tools ran alongside retrieval
+    tool_context = "\n".join([
+        f"Tool {call['tool']}: {call['result']}"
+        for call in state.get("tool_calls") or []
+    ])
+    tool_section = f"""
+    Tool Results:
+    {tool_context}
+    """ if tool_context else ""
+    
+    # Template, query and tool results are always sent; history and
+    # retrieved chunks share what is left of the budget
+    reserved = count_tokens(PROMPT_TEMPLATE.format(
+        query=query, documents="", memory="", history="", tool_section=tool_section
+    ))
+    context = build_context(query, state.get("retrieved") or [], state["messages"], reserved)
+    
+    prompt = PROMPT_TEMPLATE.format(
+        query=query,
+        documents=context["documents"] or "No relevant documents found.",
+        memory=context["memory"] or "No relevant memories found.",
+        history=context["history"],
+        tool_section=tool_section
+    )
+    prompt_tokens = {**context["tokens"], "total": count_tokens(prompt)}
+    return prompt, prompt_tokens
+
+
+def fallback_response(state: AgentState) -> str:
+    """Answer without the LLM when the latency budget ran out: the best material found."""
+    passages = [
+        hit["content"][:300].strip() for hit in state.get("retrieved") or []
+        if hit.get("source") == "documents"
+    ][:3]
+    passages += [f"{call['tool']}: {call['result'][:300]}" for call in state.get("tool_calls") or [] if not call.get("degraded")]
+    if not passages:
+        return "I couldn't put an answer together in time. Please try again."
+    bullets = "\n".join(f"- {passage}" for passage in passages)
+    return f"I couldn't complete a full answer in time. The most relevant information I found:\n{bullets}"
+
+
+def _out_of_time(state: AgentState, prompt_tokens: Dict[str, int]):
+    return {
+        **state,
+        "response": fallback_response(state),
+        "prompt_tokens": prompt_tokens,
+        "degraded": budget.degrade(state, "reasoning")
+    }
+
+
+def reasoning_node(state: AgentState):
+    """Main reasoning and response generation."""
+    prompt, prompt_tokens = build_reasoning_prompt(state)
+    if budget.remaining(state) * 1000 < budget.REASONING_MIN_MS:
+        return _out_of_time(state, prompt_tokens)
     
     try:
-        response = llm.invoke(prompt)
+        response = llm_client.invoke(prompt, deadline=state.get("deadline"))
         return {
             **state,
-            "response": response.content
+            "response": response.content,
+            "prompt_tokens": prompt_tokens
         }
+    except (asyncio.TimeoutError, TimeoutError):
+        return _out_of_time(state, prompt_tokens)
     except Exception as e:
         return {
             **state,
-            "response": f"Error generating response: {str(e)}"
+            "response": f"Error generating response: {str(e)}",
+            "prompt_tokens": prompt_tokens
         }
 
 
+async def reasoning_node_async(state: AgentState):
+    """Async variant of reasoning_node using llm_client.ainvoke."""
+    prompt, prompt_tokens = build_reasoning_prompt(state)
+    if budget.remaining(state) * 1000 < budget.REASONING_MIN_MS:
+        return _out_of_time(state, prompt_tokens)
+    
+    try:
+        response = await llm_client.ainvoke(
+            prompt, deadline=state.get("deadline"), coalesce=not state.get("streaming")
+        )
+        return {
+            **state,
+            "response": response.content,
+            "prompt_tokens": prompt_tokens
+        }
+    except (asyncio.TimeoutError, TimeoutError):
+        return _out_of_time(state, prompt_tokens)
+    except Exception as e:
+        return {
+            **state,
+            "response": f"Error generating response: {str(e)}",
+            "prompt_tokens": prompt_tokens
+        }
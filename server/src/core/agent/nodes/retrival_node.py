@@ -1,23 +1,170 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from src.core.agent import budget
 from src.core.agent.state import AgentState
-from src.core.agent.tools.memory_retrival_tool import memory_search_tool
-from src.core.agent.tools.document_search_tool import document_search_tool
+from src.core.agent.tools.memory_retrival_tool import search_memories, format_memory_hits
+from src.core.agent.tools.document_search_tool import search_documents, format_document_hits
+from src.core.agent.nodes.tool_execution_node import run_tools, run_tools_async, degraded_tools
+from src.utils.concurrency import run_in_pool, submit_in_context
+from src.utils.metrics import RETRIEVAL_DURATION
+from src.utils.tracing import span
+
+# Per-source timeout in seconds; a slow source is dropped instead of stalling the chat
+RETRIEVAL_TIMEOUT = float(os.getenv("RETRIEVAL_TIMEOUT", "5"))
+
+# Threads running document and memory searches. Kept apart from the shared
+# blocking pool: the sync agent runs there and would deadlock waiting on work
+# queued behind it, and a search that timed out keeps its thread until it
+# returns, so slow searches must not use up the threads every request needs.
+RETRIEVAL_POOL_SIZE = int(os.getenv("RETRIEVAL_POOL_SIZE", "8"))
+
+_fanout_pool = ThreadPoolExecutor(max_workers=RETRIEVAL_POOL_SIZE, thread_name_prefix="ragbot-retrieval")
+
+# (name, context heading, search function, formatter). Sources are queried
+# concurrently and merged into the context in this order. Search functions
+# return hits; the reasoning prompt fits them into its token budget.
+RETRIEVAL_SOURCES = [
+    ("documents", "Document Context", lambda state: search_documents(state["user_query"]), format_document_hits),
+    ("memory", "Memory Context", lambda state: search_memories(state["user_query"], state["session_id"]), format_memory_hits),
+]
+
+
+def _merge_results(state: AgentState, results):
+    """Combine per-source results into the hit list, context string and timings.
+
+    Each result is (hits or an error message, elapsed milliseconds, outcome).
+    Sources that timed out or were skipped for lack of time are degraded.
+    """
+    sections = []
+    retrieved = []
+    degraded = []
+    timings = dict(state.get("timings") or {})
+    for (name, heading, _, format_hits), (hits, elapsed_ms, outcome) in zip(RETRIEVAL_SOURCES, results):
+        if isinstance(hits, str):
+            sections.append(f"{heading}:\n{hits}")
+        else:
+            sections.append(f"{heading}:\n{format_hits(hits)}")
+            retrieved.extend(hits)
+        timings[f"retrieval.{name}"] = elapsed_ms
+        if outcome in ("timeout", "skipped"):
+            degraded.append(f"retrieval.{name}")
+    
+    return {
+        **state,
+        "context": "\n\n".join(sections),
+        "retrieved": retrieved,
+        "timings": timings,
+        "degraded": budget.degrade(state, *degraded)
+    }
+
+
+def retrieval_timeout(state: AgentState) -> float:
+    """Seconds retrieval may take, keeping time back for reasoning."""
+    return budget.stage_timeout(state, RETRIEVAL_TIMEOUT, budget.REASONING_RESERVE_MS)
+
+
+def _skipped(name: str):
+    return f"{name} search skipped: latency budget exhausted.", 0.0, "skipped"
+
+
+def _traced_search(name, search, state: AgentState):
+    with span(f"retrieval.{name}", source=name):
+        return search(state)
+
 
 def retrieval_node(state: AgentState):
     """Retrieve relevant context from documents and memory."""
-    query = state["user_query"]
-    session_id = state["session_id"]
+    timeout = retrieval_timeout(state)
+    if timeout <= 0:
+        return _merge_results(state, [_skipped(name) for name, _, _, _ in RETRIEVAL_SOURCES])
+    
+    started = time.perf_counter()
+    futures = [
+        submit_in_context(_fanout_pool, _traced_search, name, search, state)
+        for name, _, search, _ in RETRIEVAL_SOURCES
+    ]
+    deadline = started + timeout
+    
+    results = []
+    for (name, _, _, _), future in zip(RETRIEVAL_SOURCES, futures):
+        outcome = "ok"
+        try:
+            hits = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeoutError:
+            hits = f"{name} search timed out."
+            outcome = "timeout"
+        except Exception as e:
+            hits = f"{name} search failed: {str(e)}"
+            outcome = "error"
+        elapsed = time.perf_counter() - started
+        RETRIEVAL_DURATION.observe(elapsed, source=name, outcome=outcome)
+        results.append((hits, round(elapsed * 1000, 1), outcome))
+    
+    return _merge_results(state, results)
+
+
+async def _search_source_async(name, search, state: AgentState, timeout: float):
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        hits = await asyncio.wait_for(run_in_pool(_fanout_pool, _traced_search, name, search, state), timeout)
+    except asyncio.TimeoutError:
+        hits = f"{name} search timed out."
+        outcome = "timeout"
+    except Exception as e:
+        hits = f"{name} search failed: {str(e)}"
+        outcome = "error"
+    elapsed = time.perf_counter() - started
+    RETRIEVAL_DURATION.observe(elapsed, source=name, outcome=outcome)
+    return hits, round(elapsed * 1000, 1), outcome
+
+
+async def retrieval_node_async(state: AgentState):
+    """Async variant of retrieval_node; sources are fanned out on the retrieval pool."""
+    timeout = retrieval_timeout(state)
+    if timeout <= 0:
+        return _merge_results(state, [_skipped(name) for name, _, _, _ in RETRIEVAL_SOURCES])
     
-    # Search documents
-    doc_context = document_search_tool(query)
+    results = await asyncio.gather(*[
+        _search_source_async(name, search, state, timeout)
+        for name, _, search, _ in RETRIEVAL_SOURCES
+    ])
     
-    # Search memory
-    memory_context = memory_search_tool(query, session_id)
+    return _merge_results(state, results)
+
+
+def retrieval_with_tools_node(state: AgentState):
+    """Retrieve context and run any needed tools concurrently.
     
-    # Combine contexts
-    context = f"Document Context:\n{doc_context}\n\nMemory Context:\n{memory_context}"
+    Used by the single-call topology so that one reasoning call sees both
+    document context and tool results.
+    """
+    # Tools share the retrieval deadline, so a slow web search cannot outlast it
+    deadline = time.monotonic() + retrieval_timeout(state)
+    tools_future = submit_in_context(_fanout_pool, run_tools, state["user_query"], deadline)
+    retrieved = retrieval_node(state)
+    tool_calls = tools_future.result()
     
     return {
-        **state,
-        "context": context
+        **retrieved,
+        "tool_calls": tool_calls,
+        "degraded": budget.degrade(retrieved, *degraded_tools(tool_calls))
     }
 
+
+async def retrieval_with_tools_node_async(state: AgentState):
+    """Async variant of retrieval_with_tools_node."""
+    deadline = time.monotonic() + retrieval_timeout(state)
+    retrieved, tool_calls = await asyncio.gather(
+        retrieval_node_async(state),
+        run_tools_async(state["user_query"], deadline)
+    )
+    
+    return {
+        **retrieved,
+        "tool_calls": tool_calls,
+        "degraded": budget.degrade(retrieved, *degraded_tools(tool_calls))
+    }
@@ -1,39 +1,110 @@
+import time
+
+from src.core.agent import budget
 from src.core.agent.state import AgentState
-from src.core.agent.tools.web_search_tool import web_search_tool
+from src.core.agent.tools.web_search_tool import web_search_sync, web_search_async
 from src.core.agent.tools.date_retrieval_tool import date_retrieval_tool
+from src.external.web_search import DEADLINE_REACHED, TIMED_OUT, WEB_SEARCH_TIMEOUT
+from src.utils.metrics import TOOL_DURATION, timed
 
 
+# Simple keyword-based tool selection
+WEB_KEYWORDS = ["latest", "current", "today", "news", "recent", "2024", "2025"]
+DATE_KEYWORDS = ["when", "date", "time", "today", "now"]
 
-def tool_execution_node(state: AgentState):
-    """Execute tools if needed."""
-    query = state["user_query"]
-    response = state["response"]
+
+def needs_web_search(query: str) -> bool:
+    return any(keyword in query.lower() for keyword in WEB_KEYWORDS)
+
+
+def needs_date_info(query: str) -> bool:
+    return any(keyword in query.lower() for keyword in DATE_KEYWORDS)
+
+
+def run_tools(query: str, deadline: float = None):
+    """Select and run the tools a query needs, returning their tool calls.
     
-    # Simple tool selection logic
+    ``deadline`` (a ``time.monotonic()`` value) bounds the web search.
+    """
     tool_calls = []
     
     # Check if web search is needed
-    web_keywords = ["latest", "current", "today", "news", "recent", "2024", "2025"]
-    if any(keyword in query.lower() for keyword in web_keywords):
-        search_result = web_search_tool(query)
+    if needs_web_search(query):
+        with timed(TOOL_DURATION, "tool.web_search", tool="web_search"):
+            search_result = web_search_sync(query, deadline)
         tool_calls.append({
             "tool": "web_search",
             "query": query,
-            "result": search_result
+            "result": search_result,
+            # Cut short by the deadline rather than answered
+            "degraded": search_result in (TIMED_OUT, DEADLINE_REACHED)
         })
     
     # Check if date info is needed
-    date_keywords = ["when", "date", "time", "today", "now"]
-    if any(keyword in query.lower() for keyword in date_keywords):
-        date_result = date_retrieval_tool(query)
+    if needs_date_info(query):
+        with timed(TOOL_DURATION, "tool.date_retrieval", tool="date_retrieval"):
+            date_result = date_retrieval_tool.invoke(query)
         tool_calls.append({
             "tool": "date_retrieval",
             "query": query,
             "result": date_result
         })
     
+    return tool_calls
+
+
+async def run_tools_async(query: str, deadline: float = None):
+    """Async variant of run_tools with non-blocking web search."""
+    tool_calls = []
+    
+    if needs_web_search(query):
+        with timed(TOOL_DURATION, "tool.web_search", tool="web_search"):
+            search_result = await web_search_async(query, deadline)
+        tool_calls.append({
+            "tool": "web_search",
+            "query": query,
+            "result": search_result,
+            # Cut short by the deadline rather than answered
+            "degraded": search_result in (TIMED_OUT, DEADLINE_REACHED)
+        })
+    
+    if needs_date_info(query):
+        with timed(TOOL_DURATION, "tool.date_retrieval", tool="date_retrieval"):
+            date_result = date_retrieval_tool.invoke(query)
+        tool_calls.append({
+            "tool": "date_retrieval",
+            "query": query,
+            "result": date_result
+        })
+    
+    return tool_calls
+
+
+def degraded_tools(tool_calls) -> list:
+    """Stage names of the tool calls the deadline cut short."""
+    return [f"tool.{call['tool']}" for call in tool_calls if call.get("degraded")]
+
+
+def tools_deadline(state: AgentState) -> float:
+    """Deadline for the tools after reasoning, keeping time back for the final response."""
+    return time.monotonic() + budget.stage_timeout(state, WEB_SEARCH_TIMEOUT, budget.FINAL_RESPONSE_MIN_MS)
+
+
+def tool_execution_node(state: AgentState):
+    """Execute tools if needed."""
+    tool_calls = run_tools(state["user_query"], tools_deadline(state))
     return {
         **state,
-        "tool_calls": tool_calls
+        "tool_calls": tool_calls,
+        "degraded": budget.degrade(state, *degraded_tools(tool_calls))
     }
 
+
+async def tool_execution_node_async(state: AgentState):
+    """Async variant of tool_execution_node."""
+    tool_calls = await run_tools_async(state["user_query"], tools_deadline(state))
+    return {
+        **state,
+        "tool_calls": tool_calls,
+        "degraded": budget.degrade(state, *degraded_tools(tool_calls))
+    }
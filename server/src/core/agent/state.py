@@ -9,5 +9,10 @@ class AgentState(TypedDict):
     context: str
     response: str
     tool_calls: List[Dict[str, Any]]
-
+    timings: Dict[str, float]  # stage name -> elapsed milliseconds
+    retrieved: List[Dict[str, Any]]  # document and memory hits behind context
+    prompt_tokens: Dict[str, int]  # reasoning prompt size by section
+    deadline: float  # time.monotonic() by which the answer is due
+    degraded: List[str]  # stages dropped or cut short to meet the deadline
+    streaming: bool  # tokens are streamed to the client, so LLM calls are not shared
 
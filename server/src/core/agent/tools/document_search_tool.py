@@ -1,28 +1,32 @@
+from typing import Dict, List
+
 from langchain.tools import tool
-from src.db.vector.chroma_client import doc_collection
+from src.core.temp.retriver import hybrid_retriever
+from src.core.temp.reranker import reranker, RERANK_CANDIDATES, RERANK_TOP_K
+
+
+def search_documents(query: str, top_k: int = RERANK_TOP_K) -> List[Dict]:
+    """Reranked document chunks, full text, tagged with ``source``."""
+    # Over-fetch hybrid candidates and keep the best few after reranking
+    candidates = hybrid_retriever.search(query, k=RERANK_CANDIDATES)
+    return [{**hit, "source": "documents"} for hit in reranker.rerank(query, candidates, top_k=top_k)]
+
+
+def format_document_hits(hits: List[Dict]) -> str:
+    if not hits:
+        return "No relevant documents found."
+    response = "Document search results:\n"
+    for hit in hits:
+        filename = hit["metadata"].get('filename', 'Unknown')
+        response += f"From {filename}: {hit['content']}\n"
+    return response
+
 
 @tool("document_search_tool",return_direct=False)
 
 def document_search_tool(query: str) -> str:
     """Search through uploaded documents."""
     try:
-        results = doc_collection.query(
-            query_texts=[query],
-            n_results=5
-        )
-        
-        if results['documents'] and results['documents'][0]:
-            docs = results['documents'][0]
-            sources = results['metadatas'][0] if results['metadatas'] else []
-            
-            response = "Document search results:\n"
-            for i, (doc, source) in enumerate(zip(docs[:3], sources[:3])):
-                filename = source.get('filename', 'Unknown') if source else 'Unknown'
-                response += f"From {filename}: {doc[:200]}...\n"
-            
-            return response
-        else:
-            return "No relevant documents found."
+        return format_document_hits(search_documents(query))
     except Exception as e:
         return f"Document search failed: {str(e)}"
-
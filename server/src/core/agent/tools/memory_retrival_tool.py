@@ -1,22 +1,37 @@
-from src.db.vector.chroma_client import memory_collection
+from typing import Dict, List
 
+from src.db.vector.chroma_client import get_memory_collection
+from src.db.vector.query_embeddings import embed_query
+
+
+def search_memories(query: str, session_id: str, n_results: int = 5) -> List[Dict]:
+    """Past interactions of the session closest to the query, tagged with ``source``."""
+    results = get_memory_collection().query(
+        query_embeddings=[embed_query(query)],
+        n_results=n_results,
+        where={"session_id": session_id}
+    )
+    if not results['documents'] or not results['documents'][0]:
+        return []
+    return [
+        {"source": "memory", "content": doc, "metadata": metadata or {}, "distance": distance}
+        for doc, metadata, distance in zip(
+            results['documents'][0],
+            results['metadatas'][0],
+            results['distances'][0]
+        )
+    ]
+
+
+def format_memory_hits(hits: List[Dict]) -> str:
+    if not hits:
+        return "No relevant memories found."
+    return f"Relevant memories: {'; '.join(hit['content'] for hit in hits[:3])}"
 
 
 def memory_search_tool(query: str, session_id: str) -> str:
     """Search through chat history and memory."""
     try:
-        # Search in memory collection
-        results = memory_collection.query(
-            query_texts=[query],
-            n_results=5,
-            where={"session_id": session_id}
-        )
-        
-        if results['documents'] and results['documents'][0]:
-            memories = results['documents'][0]
-            return f"Relevant memories: {'; '.join(memories[:3])}"
-        else:
-            return "No relevant memories found."
+        return format_memory_hits(search_memories(query, session_id))
     except Exception as e:
         return f"Memory search failed: {str(e)}"
-
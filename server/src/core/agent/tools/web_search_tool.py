@@ -1,22 +1,24 @@
-from langchain.tools import tool 
-import requests
+from langchain.tools import tool
+
+from src.external.web_search import web_search_client
+
 
 @tool("websearch_tool",return_direct=False)
 
 def web_search_tool(query: str) -> str:
     """Search the web for current information."""
-    try:
-        # Using DuckDuckGo instant answer API (free)
-        url = f"https://api.duckduckgo.com/?q={query}&format=json&no_html=1&skip_disambig=1"
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        
-        if data.get('AbstractText'):
-            return f"Search result: {data['AbstractText']}"
-        elif data.get('Answer'):
-            return f"Answer: {data['Answer']}"
-        else:
-            return f"No specific answer found for: {query}"
-    except Exception as e:
-        return f"Search failed: {str(e)}"
+    return web_search_sync(query)
+
+
+def web_search_sync(query: str, deadline: float = None) -> str:
+    """Blocking web search used by the sync agent graph."""
+    return web_search_client.search_sync(query, deadline)
+
+
+async def web_search_async(query: str, deadline: float = None) -> str:
+    """Non-blocking web search used by the async agent graph.
 
+    Cached and circuit-broken; ``deadline`` is a ``time.monotonic()`` value
+    after which the caller stops waiting.
+    """
+    return await web_search_client.search(query, deadline)
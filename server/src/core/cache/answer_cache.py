@@ -0,0 +1,129 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.core.agent.nodes.tool_execution_node import needs_web_search, needs_date_info
+from src.db.sql.session_index import SessionIndex
+from src.db.vector.query_embeddings import embed_query
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Minimum cosine similarity between query embeddings for a hit
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))
+
+# Scope of answers given without chat history or memories, shared by all sessions
+SHARED_SCOPE = ""
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class AnswerCache:
+    """Semantic cache of final answers in front of the agent graph.
+    
+    A query hits when a cached query's embedding is at least ``threshold``
+    similar and was answered against the current corpus version. Entries
+    expire after ``ttl`` seconds and the least recently used entry is evicted
+    beyond ``max_size``. Time-sensitive queries (the ones that trigger web
+    search or date tools) are never cached.
+    
+    Entries are scoped: an answer that could draw on a session's history
+    and memories only serves that session, see ``session_scope``.
+    """
+    
+    def __init__(self, threshold: float = ANSWER_CACHE_THRESHOLD, ttl: float = ANSWER_CACHE_TTL, max_size: int = ANSWER_CACHE_SIZE, enabled: bool = ANSWER_CACHE_ENABLED):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_size = max_size
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+    
+    @staticmethod
+    def is_time_sensitive(query: str) -> bool:
+        return needs_web_search(query) or needs_date_info(query)
+    
+    @staticmethod
+    def session_scope(session_id: str) -> str:
+        """Cache scope for a chat turn in ``session_id``.
+        
+        A session with no stored activity has no history or memories, so its
+        answer depends only on the query and corpus and is shared.
+        """
+        return session_id if SessionIndex.exists(session_id) else SHARED_SCOPE
+    
+    def lookup(self, query: str, corpus_version: int, scope: str = SHARED_SCOPE) -> Optional[Dict]:
+        """Return the cached {"response", "sources"} for a similar query, or None."""
+        if not self.enabled:
+            return None
+        if self.is_time_sensitive(query):
+            with self._lock:
+                self.bypassed += 1
+            return None
+        
+        embedding = _unit(embed_query(query))
+        now = time.time()
+        with self._lock:
+            # Drop entries answered against an older corpus or past their TTL
+            for key in [k for k, e in self._entries.items() if e["version"] != corpus_version or now - e["created"] > self.ttl]:
+                del self._entries[key]
+            
+            keys = [k for k, e in self._entries.items() if e["scope"] == scope]
+            if keys:
+                matrix = np.stack([self._entries[k]["embedding"] for k in keys])
+                similarities = matrix @ embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.hits += 1
+                    entry = self._entries[keys[best]]
+                    return {"response": entry["response"], "sources": entry["sources"], "similarity": float(similarities[best])}
+            self.misses += 1
+            return None
+    
+    def store(self, query: str, response: str, sources: List[Dict], corpus_version: int, scope: str = SHARED_SCOPE):
+        if not self.enabled or self.is_time_sensitive(query):
+            return
+        embedding = _unit(embed_query(query))
+        with self._lock:
+            self._entries[self._next_id] = {
+                "embedding": embedding,
+                "response": response,
+                "sources": sources,
+                "version": corpus_version,
+                "scope": scope,
+                "created": time.time()
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round(self.hits / total, 3) if total else None
+        }
+
+
+answer_cache = AnswerCache()
@@ -1,23 +1,39 @@
 from datetime import datetime
 from typing import List,Dict
-from src.db.vector.chroma_client import memory_collection
+from src.db.vector.chroma_client import get_memory_collection
+from src.db.sql.turn_store import TurnStore
+from src.db.sql.session_index import SessionIndex
+from src.db.sql.compaction_state import CompactionState
+from src.db.vector.bulk import delete_where
 import uuid
 
 class MemoryManager:
     @staticmethod
     def store_interaction(session_id: str, user_message: str, bot_response: str, user_id: str = "default_user"):
-        """Store chat interaction in memory collection."""
+        """Store chat interaction in the turn log and memory collection."""
+        timestamp = datetime.now().isoformat()
+        
+        # Ordered turn log used for history
         try:
-            # Create memory document
+            TurnStore.append(session_id, [
+                {"role": "user", "content": user_message, "timestamp": timestamp},
+                {"role": "assistant", "content": bot_response, "timestamp": timestamp}
+            ], user_id=user_id)
+            SessionIndex.record_turns(session_id, user_id, 2, timestamp)
+        except Exception as e:
+            print(f"Failed to store turns: {e}")
+        
+        try:
+            # Create memory document, used only for semantic recall
             memory_text = f"User: {user_message}\nAssistant: {bot_response}"
             
             # Generate embedding and store
-            memory_collection.add(
+            get_memory_collection().add(
                 documents=[memory_text],
                 metadatas=[{
                     "session_id": session_id,
                     "user_id": user_id,
-                    "timestamp": datetime.now().isoformat(),
+                    "timestamp": timestamp,
                     "type": "chat_interaction"
                 }],
                 ids=[f"memory_{session_id}_{uuid.uuid4()}"]
@@ -27,26 +43,22 @@ class MemoryManager:
     
     @staticmethod
     def get_session_history(session_id: str, limit: int = 10) -> List[Dict]:
-        """Retrieve chat history for a session."""
+        """Retrieve the last ``limit`` turns of a session, oldest first.
+        
+        Each turn is ``{"role", "content", "timestamp"}``.
+        """
         try:
-            results = memory_collection.query(
-                query_texts=["conversation history"],
-                n_results=limit,
-                where={"session_id": session_id}
-            )
-            
-            history = []
-            if results['documents'] and results['documents'][0]:
-                for doc, metadata in zip(results['documents'][0], results['metadatas'][0]):
-                    history.append({
-                        "content": doc,
-                        "timestamp": metadata.get("timestamp"),
-                        "type": metadata.get("type")
-                    })
-            
-            return sorted(history, key=lambda x: x.get("timestamp", ""))
+            return TurnStore.last_turns(session_id, limit)
         except Exception as e:
             print(f"Failed to retrieve history: {e}")
             return []
-
-
+    
+    @staticmethod
+    def delete_session(session_id: str) -> Dict[str, int]:
+        """Remove a session's memories, turns and index entries."""
+        # Exact bulk delete by metadata, no query embedding or result cap
+        deleted_memories = delete_where(get_memory_collection(), {"session_id": session_id})
+        deleted_turns = TurnStore.delete_session(session_id)
+        SessionIndex.remove(session_id)
+        CompactionState.remove(session_id)
+        return {"deleted_memories": deleted_memories, "deleted_turns": deleted_turns}
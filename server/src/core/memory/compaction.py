@@ -0,0 +1,236 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from src.core.agent.context_builder import truncate_tokens
+from src.core.memory.MemoryManager import MemoryManager
+from src.db.sql.compaction_state import CompactionState
+from src.db.sql.session_index import SessionIndex
+from src.db.sql.turn_store import TurnStore
+from src.db.vector.chroma_client import get_memory_collection
+from src.external.llm_client import llm_client
+from src.utils.concurrency import run_in_pool
+from src.utils.process_lock import FileLock
+
+# Seconds between background passes; 0 disables the background job
+MEMORY_COMPACTION_INTERVAL = float(os.getenv("MEMORY_COMPACTION_INTERVAL", "3600"))
+# Raw interactions older than this are folded into summaries
+MEMORY_RAW_MAX_AGE_DAYS = float(os.getenv("MEMORY_RAW_MAX_AGE_DAYS", "7"))
+# A session with more raw interactions than this is compacted down to MEMORY_RAW_KEEP
+MEMORY_RAW_MAX_PER_SESSION = int(os.getenv("MEMORY_RAW_MAX_PER_SESSION", "50"))
+MEMORY_RAW_KEEP = int(os.getenv("MEMORY_RAW_KEEP", "20"))
+# Interactions folded into one summary memory
+MEMORY_SUMMARY_BATCH = int(os.getenv("MEMORY_SUMMARY_BATCH", "20"))
+# Beyond this, the oldest summaries of a session are merged
+MEMORY_MAX_SUMMARIES = int(os.getenv("MEMORY_MAX_SUMMARIES", "5"))
+MEMORY_SUMMARY_TOKENS = int(os.getenv("MEMORY_SUMMARY_TOKENS", "200"))
+# "llm" summarizes with the chat model, "extractive" keeps the user's questions
+MEMORY_SUMMARIZER = os.getenv("MEMORY_SUMMARIZER", "llm")
+# Sessions inactive this long are deleted entirely; 0 keeps them forever
+SESSION_TTL_DAYS = float(os.getenv("SESSION_TTL_DAYS", "30"))
+# Sessions handled per pass, so one pass never holds the pool for long
+MEMORY_COMPACTION_BATCH = int(os.getenv("MEMORY_COMPACTION_BATCH", "100"))
+
+INTERACTION = "chat_interaction"
+SUMMARY = "session_summary"
+
+SUMMARY_PROMPT = """Summarize these earlier exchanges from one chat session into a short memory
+for future turns. Keep facts about the user, their preferences, decisions made and
+open questions. Use at most {words} words and no preamble.
+
+{exchanges}
+"""
+
+
+def extractive_summary(texts: List[str], max_tokens: int = MEMORY_SUMMARY_TOKENS) -> str:
+    """The user side of each exchange, which says what the session was about."""
+    asked = []
+    for text in texts:
+        user_part = text.split("\nAssistant:", 1)[0].replace("User:", "", 1).strip()
+        if user_part:
+            asked.append(user_part)
+    return truncate_tokens("Earlier the user asked: " + "; ".join(asked), max_tokens)
+
+
+class MemoryCompactor:
+    """Keeps the chat_history collection proportional to active sessions.
+
+    Per session, raw interactions past the age limit, or beyond the count
+    limit, are replaced by summary memories (``type: session_summary``)
+    that memory search still finds; the turn log swaps the same turns for
+    one summary turn. Passes run on a thread of their own, so the blocking
+    pool stays free for requests. Sessions inactive past the TTL are
+    deleted. Only sessions with new activity or ageing raw memories are
+    looked at, tracked in CompactionState.
+
+    With several server workers only one compacts: the first to take the
+    runner lock keeps it for its lifetime, the others skip their passes and
+    take over if that worker exits.
+    """
+
+    def __init__(self):
+        self.last_run = None
+        self.totals = {"runs": 0, "sessions_compacted": 0, "evicted": 0, "summaries_written": 0, "sessions_expired": 0}
+        self._lock = threading.Lock()
+        self._runner_lock = FileLock("memory_compaction")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-compaction")
+
+    def summarize(self, texts: List[str]) -> str:
+        if MEMORY_SUMMARIZER == "llm":
+            prompt = SUMMARY_PROMPT.format(words=int(MEMORY_SUMMARY_TOKENS * 0.75), exchanges="\n\n".join(texts))
+            try:
+                return truncate_tokens(llm_client.invoke(prompt).content.strip(), MEMORY_SUMMARY_TOKENS)
+            except Exception as e:
+                print(f"Memory summarization failed, using extractive summary: {e}")
+        return extractive_summary(texts)
+
+    def _write_summary(self, session_id: str, user_id: str, items: List[Dict], count: int):
+        """Store one summary covering ``items`` (dicts with content and metadata)."""
+        timestamps = [item["metadata"].get("covers_to") or item["metadata"].get("timestamp", "") for item in items]
+        starts = [item["metadata"].get("covers_from") or item["metadata"].get("timestamp", "") for item in items]
+        summary = f"Summary of {count} earlier exchanges: {self.summarize([item['content'] for item in items])}"
+        get_memory_collection().add(
+            documents=[summary],
+            metadatas=[{
+                "session_id": session_id,
+                "user_id": user_id,
+                "timestamp": max(timestamps),
+                "covers_from": min(starts),
+                "covers_to": max(timestamps),
+                "interaction_count": count,
+                "type": SUMMARY
+            }],
+            ids=[f"summary_{session_id}_{uuid.uuid4()}"]
+        )
+        TurnStore.compact(session_id, summary, min(starts), max(timestamps), user_id=user_id)
+
+    def compact_session(self, session_id: str, now: datetime = None) -> Dict[str, int]:
+        """Fold evictable raw interactions of one session into summaries."""
+        now = now or datetime.now()
+        age_cutoff = (now - timedelta(days=MEMORY_RAW_MAX_AGE_DAYS)).isoformat()
+        collection = get_memory_collection()
+        items = self._session_items(session_id)
+        raw = [item for item in items if item["metadata"].get("type", INTERACTION) == INTERACTION]
+        summaries = [item for item in items if item["metadata"].get("type") == SUMMARY]
+        user_id = next((item["metadata"]["user_id"] for item in reversed(items) if item["metadata"].get("user_id")), "default_user")
+
+        keep_from = len(raw) - MEMORY_RAW_KEEP if len(raw) > MEMORY_RAW_MAX_PER_SESSION else 0
+        evict = [
+            item for i, item in enumerate(raw)
+            if i < keep_from or item["metadata"].get("timestamp", "") < age_cutoff
+        ]
+
+        written = 0
+        for start in range(0, len(evict), MEMORY_SUMMARY_BATCH):
+            batch = evict[start:start + MEMORY_SUMMARY_BATCH]
+            self._write_summary(session_id, user_id, batch, len(batch))
+            # Raw memories go only once their summary is stored
+            collection.delete(ids=[item["id"] for item in batch])
+            written += 1
+
+        # Too many summaries: merge the oldest ones into one
+        if len(summaries) + written > MEMORY_MAX_SUMMARIES:
+            if written:
+                summaries = self._session_items(session_id, SUMMARY)
+            merge = summaries[:len(summaries) - MEMORY_MAX_SUMMARIES + 1]
+            if len(merge) > 1:
+                count = sum(int(item["metadata"].get("interaction_count", 1)) for item in merge)
+                self._write_summary(session_id, user_id, merge, count)
+                collection.delete(ids=[item["id"] for item in merge])
+                written += 1
+
+        evicted_ids = {item["id"] for item in evict}
+        remaining = [item for item in raw if item["id"] not in evicted_ids]
+        oldest_raw = remaining[0]["metadata"].get("timestamp") if remaining else None
+        CompactionState.record(session_id, now.isoformat(), oldest_raw)
+        return {"evicted": len(evict), "summaries_written": written}
+
+    def _session_items(self, session_id: str, memory_type: str = None) -> List[Dict]:
+        """Memories of a session, oldest first, optionally of one type."""
+        where = {"session_id": session_id}
+        if memory_type:
+            where = {"$and": [where, {"type": memory_type}]}
+        results = get_memory_collection().get(where=where, include=["documents", "metadatas"])
+        return sorted(
+            (
+                {"id": id_, "content": doc, "metadata": metadata or {}}
+                for id_, doc, metadata in zip(results["ids"], results["documents"], results["metadatas"])
+            ),
+            key=lambda item: item["metadata"].get("timestamp", "")
+        )
+
+    def expire_sessions(self, now: datetime = None) -> int:
+        """Delete sessions inactive for longer than SESSION_TTL_DAYS."""
+        if SESSION_TTL_DAYS <= 0:
+            return 0
+        now = now or datetime.now()
+        cutoff = (now - timedelta(days=SESSION_TTL_DAYS)).isoformat()
+        expired = SessionIndex.inactive_since(cutoff, MEMORY_COMPACTION_BATCH)
+        for session_id in expired:
+            MemoryManager.delete_session(session_id)
+        return len(expired)
+
+    def run_once(self, now: datetime = None) -> Dict:
+        """One pass: expire inactive sessions, then compact the sessions that are due."""
+        if not self._runner_lock.acquire(blocking=False):
+            return {"skipped": "another worker runs compaction"}
+        if not self._lock.acquire(blocking=False):
+            return {"skipped": "already running"}
+        try:
+            now = now or datetime.now()
+            started = time.perf_counter()
+            stats = {"sessions_expired": self.expire_sessions(now), "sessions_compacted": 0, "evicted": 0, "summaries_written": 0}
+
+            active_since = (now - timedelta(days=SESSION_TTL_DAYS)).isoformat() if SESSION_TTL_DAYS > 0 else ""
+            age_cutoff = (now - timedelta(days=MEMORY_RAW_MAX_AGE_DAYS)).isoformat()
+            for session_id in CompactionState.due(active_since, age_cutoff, MEMORY_COMPACTION_BATCH):
+                try:
+                    result = self.compact_session(session_id, now)
+                except Exception as e:
+                    print(f"Memory compaction failed for session {session_id}: {e}")
+                    continue
+                if result["evicted"] or result["summaries_written"]:
+                    stats["sessions_compacted"] += 1
+                stats["evicted"] += result["evicted"]
+                stats["summaries_written"] += result["summaries_written"]
+
+            stats["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+            self.last_run = {**stats, "finished_at": datetime.now().isoformat()}
+            self.totals["runs"] += 1
+            for key in ("sessions_compacted", "evicted", "summaries_written", "sessions_expired"):
+                self.totals[key] += stats[key]
+            return stats
+        finally:
+            self._lock.release()
+
+    async def arun_once(self) -> Dict:
+        """run_once on the compaction thread."""
+        return await run_in_pool(self._executor, self.run_once)
+
+    async def run_periodically(self, interval: float = MEMORY_COMPACTION_INTERVAL):
+        """Background loop started by the server lifespan."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.arun_once()
+            except Exception as e:
+                print(f"Memory compaction pass failed: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "interval_seconds": MEMORY_COMPACTION_INTERVAL,
+            "raw_max_age_days": MEMORY_RAW_MAX_AGE_DAYS,
+            "raw_max_per_session": MEMORY_RAW_MAX_PER_SESSION,
+            "session_ttl_days": SESSION_TTL_DAYS,
+            "runner": self._runner_lock.held,
+            "last_run": self.last_run,
+            **self.totals
+        }
+
+
+memory_compactor = MemoryCompactor()
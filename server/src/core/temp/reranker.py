@@ -0,0 +1,164 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Directory with an ONNX cross-encoder (model.onnx + tokenizer.json), e.g. an
+# exported ms-marco-MiniLM-L-6-v2. Without it the lexical fallback is used.
+RERANKER_MODEL_PATH = os.getenv("RERANKER_MODEL_PATH")
+RERANKER_THREADS = int(os.getenv("RERANKER_THREADS", "2"))
+RERANKER_MAX_LENGTH = int(os.getenv("RERANKER_MAX_LENGTH", "256"))
+# Candidates fetched from hybrid retrieval before reranking
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+# Chunks kept after reranking
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "3"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "8"))
+# Cross-encoder scoring stops once this much time has been spent
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalScorer:
+    """BM25 over the candidate set, blended with vector similarity.
+    
+    Candidates found only by the lexical index have no distance and get no
+    similarity share.
+    """
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, vector_weight: float = 0.5):
+        self.k1 = k1
+        self.b = b
+        self.vector_weight = vector_weight
+    
+    def score(self, query: str, candidates: List[Dict]) -> List[float]:
+        query_terms = set(tokenize(query))
+        docs = [Counter(tokenize(c["content"])) for c in candidates]
+        if not docs:
+            return []
+        avg_len = sum(sum(d.values()) for d in docs) / len(docs) or 1.0
+        
+        bm25 = []
+        for doc in docs:
+            doc_len = sum(doc.values())
+            score = 0.0
+            for term in query_terms:
+                tf = doc.get(term, 0)
+                if not tf:
+                    continue
+                df = sum(1 for d in docs if term in d)
+                idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+                score += idf * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+            bm25.append(score)
+        
+        top = max(bm25) or 1.0
+        return [
+            self.vector_weight * (1.0 - c.get("distance", 1.0)) + (1 - self.vector_weight) * s / top
+            for c, s in zip(candidates, bm25)
+        ]
+
+
+class OnnxCrossEncoder:
+    """Scores (query, passage) pairs with a cross-encoder on CPU via onnxruntime."""
+    
+    def __init__(self, model_dir: str, threads: int = RERANKER_THREADS, max_length: int = RERANKER_MAX_LENGTH):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+        
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+    
+    def score(self, query: str, passages: List[str]) -> List[float]:
+        encodings = self.tokenizer.encode_batch([(query, passage) for passage in passages])
+        inputs = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in inputs.items() if k in self.input_names})[0]
+        return logits.reshape(len(passages), -1)[:, 0].tolist()
+
+
+class Reranker:
+    """Reorders hybrid retrieval candidates within a latency budget.
+    
+    Candidates are dicts with ``content`` and ``metadata``, in fused (RRF)
+    order, plus ``distance`` when the vector search found them. The
+    cross-encoder scores them in batches, best fused matches first;
+    candidates it could not reach within the budget keep their fused order
+    behind the scored ones. Without a cross-encoder, the lexical scorer is used.
+    """
+    
+    def __init__(self, model_dir: Optional[str] = RERANKER_MODEL_PATH):
+        self.model_dir = model_dir
+        self.lexical = LexicalScorer()
+        self._cross_encoder = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+    
+    @property
+    def cross_encoder(self) -> Optional[OnnxCrossEncoder]:
+        if self._cross_encoder is None and self.model_dir and not self._load_failed:
+            with self._lock:
+                if self._cross_encoder is None and not self._load_failed:
+                    try:
+                        self._cross_encoder = OnnxCrossEncoder(self.model_dir)
+                    except Exception as e:
+                        self._load_failed = True
+                        print(f"Failed to load reranker model, using lexical fallback: {e}")
+        return self._cross_encoder
+    
+    def rerank(
+        self,
+        query: str,
+        candidates: List[Dict],
+        top_k: int = RERANK_TOP_K,
+        budget_ms: float = RERANK_BUDGET_MS,
+        batch_size: int = RERANK_BATCH_SIZE
+    ) -> List[Dict]:
+        if not candidates:
+            return []
+        
+        cross_encoder = self.cross_encoder
+        if cross_encoder is None:
+            scores = self.lexical.score(query, candidates)
+            ranked = sorted(zip(candidates, scores), key=lambda item: item[1], reverse=True)
+            return [{**c, "rerank_score": s, "reranker": "lexical"} for c, s in ranked[:top_k]]
+        
+        started = time.perf_counter()
+        scored = []
+        next_index = 0
+        while next_index < len(candidates):
+            if (time.perf_counter() - started) * 1000 > budget_ms and scored:
+                break
+            batch = candidates[next_index:next_index + batch_size]
+            scores = cross_encoder.score(query, [c["content"] for c in batch])
+            scored.extend({**c, "rerank_score": s, "reranker": "cross_encoder"} for c, s in zip(batch, scores))
+            next_index += len(batch)
+        
+        scored.sort(key=lambda c: c["rerank_score"], reverse=True)
+        # Over budget: unscored candidates follow in fused order
+        return (scored + candidates[next_index:])[:top_k]
+
+
+reranker = Reranker()
@@ -0,0 +1,92 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from src.db.sql.lexical_index import LexicalIndex, query_terms
+from src.db.vector.chroma_client import get_doc_collection
+from src.db.vector.query_embeddings import embed_query
+from src.utils.concurrency import submit_in_context
+
+# Reciprocal rank fusion constant; larger values flatten rank differences
+RRF_K = int(os.getenv("RRF_K", "60"))
+# Candidates taken from each retriever before fusion
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+
+SEARCH_MODES = ("auto", "hybrid", "vector", "lexical")
+
+# Part numbers, error codes, versions: anything with a digit or an inner - or _
+IDENTIFIER_PATTERN = re.compile(r"^(?=.*\d)[\w\-\.]+$|^\w+[\-_]\w[\w\-]*$")
+
+# Threads for the parallel lexical and vector halves of a hybrid search. Own
+# pool: searches are issued from threads of the retrieval or blocking pool
+HYBRID_POOL_SIZE = int(os.getenv("HYBRID_POOL_SIZE", "4"))
+
+_search_pool = ThreadPoolExecutor(max_workers=HYBRID_POOL_SIZE, thread_name_prefix="ragbot-hybrid")
+
+
+def is_lexical_query(query: str) -> bool:
+    """True for short identifier-like queries where embeddings add nothing."""
+    terms = query_terms(query)
+    return 0 < len(terms) <= 3 and all(IDENTIFIER_PATTERN.match(term) for term in terms)
+
+
+def vector_search(query: str, k: int) -> List[Dict]:
+    results = get_doc_collection().query(
+        query_embeddings=[embed_query(query)],
+        n_results=k
+    )
+    if not results['ids'] or not results['ids'][0]:
+        return []
+    return [
+        {"id": id_, "content": doc, "metadata": metadata or {}, "distance": distance}
+        for id_, doc, metadata, distance in zip(
+            results['ids'][0],
+            results['documents'][0],
+            results['metadatas'][0],
+            results['distances'][0]
+        )
+    ]
+
+
+def reciprocal_rank_fusion(result_lists: Dict[str, List[Dict]], k: int = RRF_K) -> List[Dict]:
+    """Fuse ranked lists by summing 1 / (k + rank) per chunk id."""
+    fused = {}
+    for source, results in result_lists.items():
+        for rank, hit in enumerate(results, start=1):
+            entry = fused.setdefault(hit["id"], {**hit, "score": 0.0, "matched_by": []})
+            entry.update({key: value for key, value in hit.items() if key not in entry})
+            entry["score"] += 1.0 / (k + rank)
+            entry["matched_by"].append(source)
+    return sorted(fused.values(), key=lambda hit: hit["score"], reverse=True)
+
+
+class HybridRetriever:
+    """BM25 + vector retrieval fused with reciprocal rank fusion.
+    
+    Both searches run in parallel. In ``auto`` mode identifier-like queries
+    are answered from the lexical index alone, skipping the embedding model.
+    """
+    
+    def search(self, query: str, k: int = 10, mode: str = "auto", fetch_k: int = HYBRID_FETCH_K) -> List[Dict]:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}. Allowed: {SEARCH_MODES}")
+        fetch_k = max(k, fetch_k)
+        
+        if mode == "auto":
+            mode = "lexical" if is_lexical_query(query) else "hybrid"
+        
+        if mode == "lexical":
+            return reciprocal_rank_fusion({"lexical": LexicalIndex.search(query, fetch_k)})[:k]
+        if mode == "vector":
+            return reciprocal_rank_fusion({"vector": vector_search(query, fetch_k)})[:k]
+        
+        lexical_future = submit_in_context(_search_pool, LexicalIndex.search, query, fetch_k)
+        vector_future = submit_in_context(_search_pool, vector_search, query, fetch_k)
+        return reciprocal_rank_fusion({
+            "vector": vector_future.result(),
+            "lexical": lexical_future.result()
+        })[:k]
+
+
+hybrid_retriever = HybridRetriever()
@@ -0,0 +1,47 @@
+from typing import List, Optional
+
+from src.db.sql.sqlite_client import get_connection, init_schema
+
+init_schema([
+    """CREATE TABLE IF NOT EXISTS memory_compaction (
+        session_id TEXT PRIMARY KEY,
+        checked_at TEXT NOT NULL,
+        oldest_raw TEXT
+    )""",
+])
+
+
+class CompactionState:
+    """When each session's memories were last compacted, so unchanged sessions are skipped."""
+
+    @staticmethod
+    def due(active_since: str, raw_older_than: str, limit: int = 100) -> List[str]:
+        """Active sessions with turns since their last check, or raw memories past the age limit."""
+        rows = get_connection().execute(
+            """SELECT s.session_id FROM sessions s
+            LEFT JOIN memory_compaction c ON c.session_id = s.session_id
+            WHERE s.last_activity >= ?
+              AND (c.session_id IS NULL OR s.last_activity > c.checked_at OR c.oldest_raw < ?)
+            ORDER BY s.last_activity
+            LIMIT ?""",
+            (active_since, raw_older_than, limit)
+        ).fetchall()
+        return [row["session_id"] for row in rows]
+
+    @staticmethod
+    def record(session_id: str, checked_at: str, oldest_raw: Optional[str]):
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                """INSERT INTO memory_compaction (session_id, checked_at, oldest_raw) VALUES (?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    checked_at = excluded.checked_at,
+                    oldest_raw = excluded.oldest_raw""",
+                (session_id, checked_at, oldest_raw)
+            )
+
+    @staticmethod
+    def remove(session_id: str):
+        conn = get_connection()
+        with conn:
+            conn.execute("DELETE FROM memory_compaction WHERE session_id = ?", (session_id,))
@@ -0,0 +1,26 @@
+from src.db.sql.sqlite_client import get_connection, init_schema
+
+init_schema([
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('corpus_version', 0)",
+])
+
+
+class CorpusVersion:
+    """Counter bumped on every change to the document corpus.
+    
+    Stored in SQLite so every worker process sees the same version.
+    """
+    
+    @staticmethod
+    def get() -> int:
+        return get_connection().execute(
+            "SELECT value FROM meta WHERE key = 'corpus_version'"
+        ).fetchone()[0]
+    
+    @staticmethod
+    def bump() -> int:
+        conn = get_connection()
+        with conn:
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'corpus_version'")
+        return CorpusVersion.get()
@@ -0,0 +1,108 @@
+from typing import Dict, List, Optional, Tuple
+
+from src.db.sql.sqlite_client import get_connection, init_schema
+from src.db.vector.bulk import CHROMA_PAGE_SIZE
+
+init_schema([
+    """CREATE TABLE IF NOT EXISTS documents (
+        filename TEXT PRIMARY KEY,
+        file_type TEXT,
+        file_hash TEXT,
+        chunk_count INTEGER NOT NULL DEFAULT 0,
+        byte_size INTEGER,
+        upload_time TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_documents_type ON documents (file_type, filename)",
+])
+
+
+class DocumentCatalog:
+    """One row per uploaded document, maintained at ingest and delete time."""
+    
+    @staticmethod
+    def upsert(filename: str, file_type: str, file_hash: Optional[str], chunk_count: int, byte_size: Optional[int], upload_time: str):
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                """INSERT INTO documents (filename, file_type, file_hash, chunk_count, byte_size, upload_time)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (filename) DO UPDATE SET
+                    file_type = excluded.file_type,
+                    file_hash = excluded.file_hash,
+                    chunk_count = excluded.chunk_count,
+                    byte_size = excluded.byte_size,
+                    upload_time = excluded.upload_time""",
+                (filename, file_type, file_hash, chunk_count, byte_size, upload_time)
+            )
+    
+    @staticmethod
+    def remove(filename: str) -> bool:
+        conn = get_connection()
+        with conn:
+            return conn.execute("DELETE FROM documents WHERE filename = ?", (filename,)).rowcount > 0
+    
+    @staticmethod
+    def get(filename: str) -> Optional[Dict]:
+        row = get_connection().execute(
+            "SELECT * FROM documents WHERE filename = ?", (filename,)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    @staticmethod
+    def list(offset: int = 0, limit: int = 50, file_type: Optional[str] = None, query: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """Return a page of documents ordered by filename, plus the total match count."""
+        clauses, params = [], []
+        if file_type:
+            clauses.append("file_type = ?")
+            params.append(file_type)
+        if query:
+            clauses.append("filename LIKE ? ESCAPE '\\'")
+            escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        conn = get_connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM documents {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM documents {where} ORDER BY filename LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+    
+    @staticmethod
+    def stats() -> Dict:
+        row = get_connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(chunk_count), 0), COALESCE(SUM(byte_size), 0) FROM documents"
+        ).fetchone()
+        return {"document_count": row[0], "chunk_count": row[1], "byte_size": row[2]}
+    
+    @staticmethod
+    def backfill(collection) -> int:
+        """Build the catalog from chunk metadata if it is empty but the collection is not.
+        
+        Needed once for collections populated before the catalog existed.
+        """
+        if DocumentCatalog.stats()["document_count"] or not collection.count():
+            return 0
+        
+        documents = {}
+        offset = 0
+        while True:
+            page = collection.get(limit=CHROMA_PAGE_SIZE, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            for metadata in page["metadatas"]:
+                metadata = metadata or {}
+                filename = metadata.get("filename", "Unknown")
+                entry = documents.setdefault(filename, {
+                    "file_type": metadata.get("file_type", "unknown"),
+                    "file_hash": metadata.get("file_hash"),
+                    "upload_time": metadata.get("upload_time"),
+                    "chunk_count": 0
+                })
+                entry["chunk_count"] += 1
+            offset += len(page["ids"])
+        
+        for filename, entry in documents.items():
+            DocumentCatalog.upsert(filename, entry["file_type"], entry["file_hash"], entry["chunk_count"], None, entry["upload_time"])
+        return len(documents)
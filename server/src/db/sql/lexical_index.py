@@ -0,0 +1,114 @@
+import os
+import re
+from typing import Dict, List
+
+import xxhash
+
+from src.db.sql.sqlite_client import get_connection, init_schema
+from src.db.vector.bulk import CHROMA_PAGE_SIZE
+
+# Inverted index over document chunks, kept next to the vector store
+LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "./data/lexical_index.sqlite3")
+
+# Keep identifiers such as "XJ-9000" or "ERR_TIMEOUT" as single terms
+TERM_PATTERN = re.compile(r"[\w\-]+")
+
+init_schema([
+    # Earlier layout without a per-chunk key; the startup backfill refills the index
+    "DROP TABLE IF EXISTS chunks",
+    # rowid is derived from chunk_id, which makes it the table's unique key
+    """CREATE VIRTUAL TABLE IF NOT EXISTS chunk_fts USING fts5(
+        content,
+        chunk_id UNINDEXED,
+        filename UNINDEXED,
+        chunk_index UNINDEXED,
+        tokenize = "unicode61 tokenchars '-_'"
+    )""",
+], path=LEXICAL_INDEX_PATH)
+
+
+def query_terms(query: str) -> List[str]:
+    return [term for term in TERM_PATTERN.findall(query.lower()) if term.strip("-_")]
+
+
+def chunk_rowid(chunk_id: str) -> int:
+    """Signed 64-bit rowid for a chunk id."""
+    return xxhash.xxh3_64_intdigest(chunk_id) - (1 << 63)
+
+
+class LexicalIndex:
+    """SQLite FTS5 index over document chunks, ranked with BM25."""
+    
+    @staticmethod
+    def add(records: List[Dict]):
+        """Index chunks given as {"id", "content", "metadata"}; a known id is replaced."""
+        conn = get_connection(LEXICAL_INDEX_PATH)
+        with conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO chunk_fts (rowid, content, chunk_id, filename, chunk_index)
+                VALUES (?, ?, ?, ?, ?)""",
+                [
+                    (
+                        chunk_rowid(r["id"]), r["content"], r["id"],
+                        r["metadata"].get("filename"), r["metadata"].get("chunk_index")
+                    )
+                    for r in records
+                ]
+            )
+    
+    @staticmethod
+    def delete_ids(ids: List[str]) -> int:
+        conn = get_connection(LEXICAL_INDEX_PATH)
+        with conn:
+            return conn.executemany(
+                "DELETE FROM chunk_fts WHERE rowid = ?", [(chunk_rowid(id_),) for id_ in ids]
+            ).rowcount
+    
+    @staticmethod
+    def delete_filename(filename: str) -> int:
+        conn = get_connection(LEXICAL_INDEX_PATH)
+        with conn:
+            return conn.execute("DELETE FROM chunk_fts WHERE filename = ?", (filename,)).rowcount
+    
+    @staticmethod
+    def search(query: str, k: int = 10) -> List[Dict]:
+        """Return up to k chunks ranked by BM25 (best first)."""
+        terms = query_terms(query)
+        if not terms:
+            return []
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in terms)
+        rows = get_connection(LEXICAL_INDEX_PATH).execute(
+            """SELECT chunk_id, content, filename, chunk_index, bm25(chunk_fts) AS rank
+            FROM chunk_fts WHERE chunk_fts MATCH ? ORDER BY rank LIMIT ?""",
+            (match, k)
+        ).fetchall()
+        return [{
+            "id": row["chunk_id"],
+            "content": row["content"],
+            "metadata": {"filename": row["filename"], "chunk_index": row["chunk_index"]},
+            "bm25": -row["rank"]
+        } for row in rows]
+    
+    @staticmethod
+    def count() -> int:
+        return get_connection(LEXICAL_INDEX_PATH).execute("SELECT COUNT(*) FROM chunk_fts").fetchone()[0]
+    
+    @staticmethod
+    def backfill(collection) -> int:
+        """Index every chunk of the collection if the index is empty but the collection is not."""
+        if LexicalIndex.count() or not collection.count():
+            return 0
+        
+        indexed = 0
+        offset = 0
+        while True:
+            page = collection.get(limit=CHROMA_PAGE_SIZE, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+            LexicalIndex.add([
+                {"id": id_, "content": doc or "", "metadata": metadata or {}}
+                for id_, doc, metadata in zip(page["ids"], page["documents"], page["metadatas"])
+            ])
+            indexed += len(page["ids"])
+            offset += len(page["ids"])
+        return indexed
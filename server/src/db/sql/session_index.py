@@ -0,0 +1,119 @@
+from typing import Dict, List, Optional, Tuple
+
+from src.db.sql.sqlite_client import get_connection, init_schema
+from src.db.vector.bulk import CHROMA_PAGE_SIZE
+
+init_schema([
+    """CREATE TABLE IF NOT EXISTS sessions (
+        session_id TEXT PRIMARY KEY,
+        user_id TEXT,
+        turn_count INTEGER NOT NULL DEFAULT 0,
+        first_activity TEXT NOT NULL,
+        last_activity TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity)",
+    "CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions (user_id, last_activity)",
+])
+
+
+class SessionIndex:
+    """One row per chat session, kept current by MemoryManager.store_interaction."""
+    
+    @staticmethod
+    def record_turns(session_id: str, user_id: str, turn_count: int, timestamp: str):
+        """Add turns to a session, creating it on first activity."""
+        conn = get_connection()
+        with conn:
+            conn.execute(
+                """INSERT INTO sessions (session_id, user_id, turn_count, first_activity, last_activity)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (session_id) DO UPDATE SET
+                    user_id = excluded.user_id,
+                    turn_count = sessions.turn_count + excluded.turn_count,
+                    first_activity = MIN(sessions.first_activity, excluded.first_activity),
+                    last_activity = MAX(sessions.last_activity, excluded.last_activity)""",
+                (session_id, user_id, turn_count, timestamp, timestamp)
+            )
+    
+    @staticmethod
+    def exists(session_id: str) -> bool:
+        row = get_connection().execute(
+            "SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return row is not None
+    
+    @staticmethod
+    def remove(session_id: str) -> bool:
+        conn = get_connection()
+        with conn:
+            return conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,)).rowcount > 0
+    
+    @staticmethod
+    def list(offset: int = 0, limit: int = 50, user_id: Optional[str] = None) -> Tuple[List[Dict], int]:
+        """Return a page of sessions, most recently active first, plus the total."""
+        where, params = ("WHERE user_id = ?", [user_id]) if user_id else ("", [])
+        conn = get_connection()
+        total = conn.execute(f"SELECT COUNT(*) FROM sessions {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM sessions {where} ORDER BY last_activity DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [dict(row) for row in rows], total
+    
+    @staticmethod
+    def inactive_since(cutoff: str, limit: int = 100) -> List[str]:
+        """Sessions whose last activity is older than ``cutoff``, oldest first."""
+        rows = get_connection().execute(
+            "SELECT session_id FROM sessions WHERE last_activity < ? ORDER BY last_activity LIMIT ?",
+            (cutoff, limit)
+        ).fetchall()
+        return [row["session_id"] for row in rows]
+    
+    @staticmethod
+    def count() -> int:
+        return get_connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    
+    @staticmethod
+    def backfill(collection) -> int:
+        """Build the index from stored interactions if it is empty but the collection is not.
+        
+        Needed once for history stored before the index existed.
+        """
+        if SessionIndex.count() or not collection.count():
+            return 0
+        
+        sessions = {}
+        offset = 0
+        while True:
+            page = collection.get(limit=CHROMA_PAGE_SIZE, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            for metadata in page["metadatas"]:
+                metadata = metadata or {}
+                session_id = metadata.get("session_id")
+                timestamp = metadata.get("timestamp") or ""
+                if not session_id:
+                    continue
+                entry = sessions.setdefault(session_id, {
+                    "user_id": metadata.get("user_id"),
+                    "turn_count": 0,
+                    "first_activity": timestamp,
+                    "last_activity": timestamp
+                })
+                # Each stored interaction is a user and an assistant turn
+                entry["turn_count"] += 2
+                entry["first_activity"] = min(entry["first_activity"], timestamp)
+                entry["last_activity"] = max(entry["last_activity"], timestamp)
+            offset += len(page["ids"])
+        
+        conn = get_connection()
+        with conn:
+            conn.executemany(
+                """INSERT OR IGNORE INTO sessions (session_id, user_id, turn_count, first_activity, last_activity)
+                VALUES (?, ?, ?, ?, ?)""",
+                [
+                    (session_id, e["user_id"], e["turn_count"], e["first_activity"], e["last_activity"])
+                    for session_id, e in sessions.items()
+                ]
+            )
+        return len(sessions)
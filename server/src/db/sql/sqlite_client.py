@@ -0,0 +1,60 @@
+import os
+import sqlite3
+import threading
+
+# Local relational store for ordered and catalog-style data that does not
+# belong in the vector store (chat turns, indexes, counters).
+SQLITE_DB_PATH = os.getenv("SQLITE_DB_PATH", "./data/ragbot.sqlite3")
+
+_local = threading.local()
+# Schema statements per database, run on its first connection in the process
+_schemas = {}
+_initialized = set()
+_schema_lock = threading.Lock()
+
+
+def get_connection(path: str = SQLITE_DB_PATH) -> sqlite3.Connection:
+    """Return this thread's connection to a local SQLite database."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed while a writer appends
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        connections[path] = conn
+        _ensure_schema(conn, path)
+    return conn
+
+
+def _ensure_schema(conn: sqlite3.Connection, path: str):
+    if path in _initialized:
+        return
+    with _schema_lock:
+        if path in _initialized:
+            return
+        with conn:
+            for statement in _schemas.get(path, []):
+                conn.execute(statement)
+        _initialized.add(path)
+
+
+def init_schema(statements, path: str = SQLITE_DB_PATH):
+    """Register CREATE ... IF NOT EXISTS statements for a store.
+    
+    They run on the first connection to ``path``, so importing a store does
+    not create its database file.
+    """
+    with _schema_lock:
+        _schemas.setdefault(path, []).extend(statements)
+        if path not in _initialized:
+            return
+    # Registered after the database was opened (a store imported late)
+    conn = get_connection(path)
+    with conn:
+        for statement in statements:
+            conn.execute(statement)
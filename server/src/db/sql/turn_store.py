@@ -0,0 +1,171 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from src.db.sql.sqlite_client import get_connection, init_schema
+from src.db.vector.bulk import CHROMA_PAGE_SIZE
+
+init_schema([
+    """CREATE TABLE IF NOT EXISTS turns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id TEXT NOT NULL,
+        user_id TEXT,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        timestamp TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_turns_session ON turns (session_id, id)",
+    # Sessions whose pre-turn-log history has been imported (or found empty)
+    "CREATE TABLE IF NOT EXISTS legacy_imports (session_id TEXT PRIMARY KEY)",
+])
+
+# Role of a turn standing in for compacted earlier turns
+SUMMARY_ROLE = "summary"
+
+
+class TurnStore:
+    """Ordered log of chat turns per session; compaction folds old turns into summaries."""
+    
+    @staticmethod
+    def append(session_id: str, turns: List[Dict[str, str]], user_id: str = "default_user"):
+        """Append turns ({"role", "content"[, "timestamp"]}) in order."""
+        now = datetime.now().isoformat()
+        conn = get_connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO turns (session_id, user_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, user_id, turn["role"], turn["content"], turn.get("timestamp") or now)
+                    for turn in turns
+                ]
+            )
+    
+    @staticmethod
+    def last_turns(session_id: str, limit: int = 10) -> List[Dict]:
+        """Return the most recent turns of a session, oldest first."""
+        rows = get_connection().execute(
+            "SELECT role, content, timestamp FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?",
+            (session_id, limit)
+        ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+    
+    @staticmethod
+    def compact(session_id: str, summary: str, covers_from: str, covers_to: str, user_id: str = "default_user") -> int:
+        """Replace the turns in [covers_from, covers_to] by one summary turn, atomically.
+        
+        The summary takes the place (and id) of the first turn it replaces, so
+        history stays in order. Returns how many turns were replaced.
+        """
+        conn = get_connection()
+        with conn:
+            first = conn.execute(
+                "SELECT MIN(id) FROM turns WHERE session_id = ? AND timestamp BETWEEN ? AND ?",
+                (session_id, covers_from, covers_to)
+            ).fetchone()[0]
+            if first is None:
+                return 0
+            replaced = conn.execute(
+                "DELETE FROM turns WHERE session_id = ? AND timestamp BETWEEN ? AND ?",
+                (session_id, covers_from, covers_to)
+            ).rowcount
+            conn.execute(
+                "INSERT INTO turns (id, session_id, user_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?, ?)",
+                (first, session_id, user_id, SUMMARY_ROLE, summary, covers_to)
+            )
+        return replaced
+    
+    @staticmethod
+    def has_session(session_id: str) -> bool:
+        row = get_connection().execute(
+            "SELECT 1 FROM turns WHERE session_id = ? LIMIT 1", (session_id,)
+        ).fetchone()
+        return row is not None
+    
+    @staticmethod
+    def import_legacy(session_id: str, turns: List[Dict[str, str]], user_id: str = "default_user") -> bool:
+        """Mark a session imported and store its legacy turns, in one transaction.
+        
+        Only the first caller across processes writes, and only if the session
+        has no turns yet. Returns whether the turns were stored.
+        """
+        now = datetime.now().isoformat()
+        conn = get_connection()
+        with conn:
+            claimed = conn.execute(
+                "INSERT OR IGNORE INTO legacy_imports (session_id) VALUES (?)", (session_id,)
+            ).rowcount
+            if not claimed or not turns or TurnStore.has_session(session_id):
+                return False
+            conn.executemany(
+                "INSERT INTO turns (session_id, user_id, role, content, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (session_id, user_id, turn["role"], turn["content"], turn.get("timestamp") or now)
+                    for turn in turns
+                ]
+            )
+        return True
+    
+    @staticmethod
+    def backfill(collection) -> int:
+        """Import history stored before the turn log existed, once per session.
+        
+        Runs at startup; a no-op once any session has been marked imported.
+        Returns how many sessions got turns.
+        """
+        if get_connection().execute("SELECT 1 FROM legacy_imports LIMIT 1").fetchone():
+            return 0
+        
+        session_ids = set()
+        offset = 0
+        while True:
+            page = collection.get(limit=CHROMA_PAGE_SIZE, offset=offset, include=["metadatas"])
+            if not page["ids"]:
+                break
+            for metadata in page["metadatas"]:
+                metadata = metadata or {}
+                if metadata.get("type") == "chat_interaction" and metadata.get("session_id"):
+                    session_ids.add(metadata["session_id"])
+            offset += len(page["ids"])
+        
+        imported = 0
+        for session_id in session_ids:
+            if TurnStore.has_session(session_id):
+                TurnStore.import_legacy(session_id, [])
+                continue
+            turns, user_id = TurnStore._legacy_turns(collection, session_id)
+            imported += TurnStore.import_legacy(session_id, turns, user_id=user_id)
+        return imported
+    
+    @staticmethod
+    def _legacy_turns(collection, session_id: str) -> Tuple[List[Dict[str, str]], str]:
+        """Rebuild a session's turns from its stored interactions, oldest first."""
+        results = collection.get(
+            where={"session_id": session_id},
+            include=["documents", "metadatas"]
+        )
+        interactions = sorted(
+            zip(results["documents"] or [], results["metadatas"] or []),
+            key=lambda item: (item[1] or {}).get("timestamp", "")
+        )
+        
+        turns = []
+        user_id = "default_user"
+        for doc, metadata in interactions:
+            metadata = metadata or {}
+            if metadata.get("type") != "chat_interaction" or "Assistant:" not in doc:
+                continue
+            user_part, assistant_part = doc.split("Assistant:", 1)
+            timestamp = metadata.get("timestamp")
+            user_id = metadata.get("user_id", user_id)
+            turns.extend([
+                {"role": "user", "content": user_part.replace("User:", "", 1).strip(), "timestamp": timestamp},
+                {"role": "assistant", "content": assistant_part.strip(), "timestamp": timestamp}
+            ])
+        return turns, user_id
+    
+    @staticmethod
+    def delete_session(session_id: str) -> int:
+        """Delete all turns of a session, returning how many were removed."""
+        conn = get_connection()
+        with conn:
+            conn.execute("DELETE FROM legacy_imports WHERE session_id = ?", (session_id,))
+            return conn.execute("DELETE FROM turns WHERE session_id = ?", (session_id,)).rowcount
@@ -0,0 +1,41 @@
+import os
+from typing import Iterator, List
+
+# Ids fetched per page when scanning a collection by metadata
+CHROMA_PAGE_SIZE = int(os.getenv("CHROMA_PAGE_SIZE", "5000"))
+
+
+def iter_ids_where(collection, where: dict, page_size: int = CHROMA_PAGE_SIZE) -> Iterator[List[str]]:
+    """Yield pages of ids matching a metadata filter, without embeddings or ANN search."""
+    offset = 0
+    while True:
+        ids = collection.get(where=where, limit=page_size, offset=offset, include=[])["ids"]
+        if not ids:
+            return
+        yield ids
+        if len(ids) < page_size:
+            return
+        offset += len(ids)
+
+
+def delete_ids(collection, ids: List[str], page_size: int = CHROMA_PAGE_SIZE):
+    """Delete records by id, a page at a time."""
+    for start in range(0, len(ids), page_size):
+        collection.delete(ids=ids[start:start + page_size])
+
+
+def count_where(collection, where: dict) -> int:
+    """Exact number of records matching a metadata filter."""
+    return sum(len(ids) for ids in iter_ids_where(collection, where))
+
+
+def delete_where(collection, where: dict) -> int:
+    """Delete every record matching a metadata filter, by id.
+    
+    Returns the number of records removed. Ids are collected first and the
+    same ids deleted, so a concurrent write cannot make the count disagree
+    with what was removed.
+    """
+    ids = [id_ for page in iter_ids_where(collection, where) for id_ in page]
+    delete_ids(collection, ids)
+    return len(ids)
@@ -1,29 +1,131 @@
-import chromadb
-from chromadb.config import Settings
+import os
+import threading
 
+# chromadb is imported when the client is built, not at module load
+from src.db.vector.embeddings import embedding_function
+from src.utils.metrics import CHROMA_DURATION, timed
+from src.utils.process_lock import FileLock
+
+# "embedded" opens the store in this process, which allows a single server
+# worker only. "http" talks to a Chroma server (`chroma run --path
+# ./data/vectordb --port 8001`) that every worker can share.
+CHROMA_MODE = os.getenv("CHROMA_MODE", "embedded")
+CHROMA_MODES = ("embedded", "http")
 CHROMA_DB_PATH = "./data/vectordb"
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8001"))
+CHROMA_SSL = os.getenv("CHROMA_SSL", "false").lower() == "true"
+
 CHAT_HISTORY_COLLECTION = "chat_history"
 DOCUMENTS_COLLECTION = "documents"
 
-chroma_client = chromadb.PersistentClient(
-    path=CHROMA_DB_PATH,
-    settings=Settings(anonymized_telemetry=False)
-)
-
-#init vectorstores
-try:
-    doc_collection = chroma_client.get_collection(DOCUMENTS_COLLECTION)
-except:
-    doc_collection = chroma_client.create_collection(
-        name=DOCUMENTS_COLLECTION,
-        metadata={"hnsw:space": "cosine"}
-    )
-
-try:
-    memory_collection = chroma_client.get_collection(CHAT_HISTORY_COLLECTION)
-except:
-    memory_collection = chroma_client.create_collection(
-        name=CHAT_HISTORY_COLLECTION,
-        metadata={"hnsw:space": "cosine"}
-    )
+# Opened on first use (normally during server startup), not at import
+_client = None
+_collections = {}
+_lock = threading.Lock()
+# Held by the one process allowed to open the embedded store
+_embedded_lock = FileLock("embedded_vectordb")
+
+# Collection methods timed into the Chroma latency histogram
+TIMED_OPERATIONS = ("add", "upsert", "update", "query", "get", "delete", "count")
+
+
+class InstrumentedCollection:
+    """Delegates to a Chroma collection, timing the data operations."""
+    
+    def __init__(self, collection):
+        self._collection = collection
+    
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in TIMED_OPERATIONS:
+            return attribute
+        
+        def timed_operation(*args, **kwargs):
+            with timed(CHROMA_DURATION, f"chroma.{name}", collection=self._collection.name, operation=name):
+                return attribute(*args, **kwargs)
+        return timed_operation
+
+
+def build_chroma_client(mode: str = CHROMA_MODE):
+    if mode not in CHROMA_MODES:
+        raise ValueError(f"Unknown Chroma mode: {mode}. Allowed: {CHROMA_MODES}")
+    import chromadb
+    from chromadb.config import Settings
+    
+    settings = Settings(anonymized_telemetry=False)
+    if mode == "http":
+        # Embeddings are still computed here, by the collection's embedding function
+        return chromadb.HttpClient(host=CHROMA_HOST, port=CHROMA_PORT, ssl=CHROMA_SSL, settings=settings)
+    if not _embedded_lock.acquire(blocking=False):
+        raise RuntimeError(
+            f"{CHROMA_DB_PATH} is already open in another process. The embedded store allows "
+            "one server worker; run a Chroma server and set CHROMA_MODE=http for more."
+        )
+    return chromadb.PersistentClient(path=CHROMA_DB_PATH, settings=settings)
+
+
+def get_chroma_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = build_chroma_client()
+    return _client
+
+
+def vector_store_location(mode: str = CHROMA_MODE) -> str:
+    """Where the vector store lives: a directory when embedded, a URL over http."""
+    if mode == "http":
+        return f"{'https' if CHROMA_SSL else 'http'}://{CHROMA_HOST}:{CHROMA_PORT}"
+    return CHROMA_DB_PATH
+
+
+def supports_multiple_workers() -> bool:
+    """Whether several server processes may share the vector store."""
+    return CHROMA_MODE == "http"
+
+
+def get_collection(name: str):
+    """Open a collection, creating it (cosine space) if it does not exist yet."""
+    collection = _collections.get(name)
+    if collection is not None:
+        return collection
+    from chromadb.errors import NotFoundError
+    from src.db.vector.chroma_embedding import ChromaEmbeddingFunction
+    
+    client = get_chroma_client()
+    with _lock:
+        if name not in _collections:
+            try:
+                collection = client.get_collection(name, embedding_function=ChromaEmbeddingFunction())
+            except NotFoundError:
+                collection = client.create_collection(
+                    name=name,
+                    metadata={"hnsw:space": "cosine"},
+                    embedding_function=ChromaEmbeddingFunction()
+                )
+            _collections[name] = InstrumentedCollection(collection)
+        return _collections[name]
+
+
+def get_doc_collection():
+    return get_collection(DOCUMENTS_COLLECTION)
+
+
+def get_memory_collection():
+    return get_collection(CHAT_HISTORY_COLLECTION)
+
+
+_LAZY_ATTRIBUTES = {
+    "chroma_client": get_chroma_client,
+    "doc_collection": get_doc_collection,
+    "memory_collection": get_memory_collection,
+}
+
 
+def __getattr__(name):
+    # Keeps `from src.db.vector.chroma_client import doc_collection` working
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,32 @@
+from typing import Any, Dict
+
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+
+from src.db.vector.embeddings import embedding_function
+
+
+class ChromaEmbeddingFunction(EmbeddingFunction[Documents]):
+    """Chroma's view of the shared ONNX embedder.
+
+    Kept apart from embeddings.py so that importing chromadb waits until a
+    collection is opened.
+    """
+
+    def __init__(self, embedder=embedding_function):
+        self.embedder = embedder
+
+    # Chroma persists the function name in the collection config. Reporting
+    # "default" keeps existing collections loadable, since the vectors match.
+    @staticmethod
+    def name() -> str:
+        return "default"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "ChromaEmbeddingFunction":
+        return ChromaEmbeddingFunction()
+
+    def __call__(self, input: Documents) -> Embeddings:
+        return self.embedder(input)
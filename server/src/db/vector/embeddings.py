@@ -1,4 +1,287 @@
-from langchain.embeddings import SentenceTransformerEmbeddings
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-embeddings = SentenceTransformerEmbeddings(model_name="all-MiniLM-L6-v2")
+import numpy as np
+import xxhash
 
+from src.utils.metrics import EMBEDDED_TEXTS, EMBEDDING_DURATION
+from src.utils.process_lock import FileLock
+
+# Directory with model.onnx + tokenizer.json. Defaults to the all-MiniLM-L6-v2
+# export Chroma downloads, so stored vectors stay compatible.
+EMBEDDING_MODEL_DIR = os.getenv(
+    "EMBEDDING_MODEL_DIR",
+    str(Path.home() / ".cache" / "chroma" / "onnx_models" / "all-MiniLM-L6-v2" / "onnx")
+)
+# Intra-op threads of the session serving queries, one batched call at a time
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", str(os.cpu_count() or 1)))
+# Intra-op threads of the session serving ingestion batches. Up to
+# INGEST_WORKERS of those run at once, so by default they split the cores
+EMBEDDING_INGEST_THREADS = int(os.getenv(
+    "EMBEDDING_INGEST_THREADS",
+    str(max(1, (os.cpu_count() or 1) // int(os.getenv("INGEST_WORKERS", "4"))))
+))
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", "256"))
+# Dynamic int8 quantization; faster on CPU, vectors drift slightly from fp32.
+# Needs the onnx package besides onnxruntime.
+EMBEDDING_QUANTIZE = os.getenv("EMBEDDING_QUANTIZE", "false").lower() == "true"
+# Concurrent small requests are coalesced into one inference call
+EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "32"))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "2"))
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() == "true"
+
+
+def model_fingerprint(path: str) -> str:
+    """Content hash of a model file; changes whenever the model does."""
+    digest = xxhash.xxh3_64()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def quantized_model_path(model_dir: str, fingerprint: str) -> str:
+    """Returns an int8 copy of model.onnx, creating it on first use.
+
+    The file is named after the source model's fingerprint, so a replaced
+    model gets a new copy. Server workers sharing the model directory take
+    turns, and the copy appears under its final name only once complete.
+    """
+    source = os.path.join(model_dir, "model.onnx")
+    target = os.path.join(model_dir, f"model_int8_{fingerprint}.onnx")
+    if os.path.exists(target):
+        return target
+    with FileLock(f"quantize_{fingerprint}"):
+        if not os.path.exists(target):
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            partial = f"{target}.{os.getpid()}.tmp"
+            try:
+                quantize_dynamic(source, partial, weight_type=QuantType.QInt8)
+                os.replace(partial, target)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+    return target
+
+
+class OnnxEmbeddingFunction:
+    """Sentence embeddings on CPU via onnxruntime, shared by every Chroma path.
+
+    Produces the same vectors as Chroma's default MiniLM function (mean
+    pooling, L2 normalised), but pads per batch instead of to 256 tokens and
+    coalesces concurrent small calls into one batch. Batches of at least
+    ``max_batch`` texts skip the queue and run on the calling thread, on a
+    separate session sized for concurrent ingestion.
+    Collections reach it through ChromaEmbeddingFunction.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = EMBEDDING_MODEL_DIR,
+        threads: int = EMBEDDING_THREADS,
+        ingest_threads: int = EMBEDDING_INGEST_THREADS,
+        quantize: bool = EMBEDDING_QUANTIZE,
+        max_batch: int = EMBEDDING_MAX_BATCH,
+        batch_wait_ms: float = EMBEDDING_BATCH_WAIT_MS,
+        max_length: int = EMBEDDING_MAX_LENGTH
+    ):
+        self.model_dir = model_dir
+        self.threads = threads
+        self.ingest_threads = ingest_threads
+        self.quantize = quantize
+        self.max_batch = max_batch
+        self.batch_wait_ms = batch_wait_ms
+        self.max_length = max_length
+        # "query": small calls, coalesced by the batcher thread.
+        # "ingest": large batches, several at once on the ingest workers.
+        self._sessions = {}
+        self._model_path = None
+        self._tokenizer = None
+        self._input_names = set()
+        self.model_id = None
+        self._load_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"calls": 0, "texts": 0, "batches": 0, "coalesced_calls": 0, "load_seconds": None}
+
+    def _ensure_model_files(self):
+        if os.path.exists(os.path.join(self.model_dir, "model.onnx")):
+            return
+        # Chroma knows how to fetch (and verify) its default model
+        from chromadb.utils.embedding_functions.onnx_mini_lm_l6_v2 import ONNXMiniLM_L6_V2
+
+        if Path(self.model_dir) != ONNXMiniLM_L6_V2.DOWNLOAD_PATH / ONNXMiniLM_L6_V2.EXTRACTED_FOLDER_NAME:
+            raise FileNotFoundError(f"No model.onnx in EMBEDDING_MODEL_DIR={self.model_dir}")
+        ONNXMiniLM_L6_V2()._download_model_if_not_exists()
+
+    def _load(self, kind: str = "query"):
+        """Load the tokenizer and model once, then one session per ``kind``."""
+        if kind in self._sessions:
+            return self._sessions[kind]
+        with self._load_lock:
+            if kind in self._sessions:
+                return self._sessions[kind]
+            import onnxruntime as ort
+
+            started = time.perf_counter()
+            if self._model_path is None:
+                self._load_model()
+
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.threads if kind == "query" else self.ingest_threads
+            options.inter_op_num_threads = 1
+            options.log_severity_level = 3
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(self._model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+            self._input_names = {i.name for i in session.get_inputs()}
+            self._sessions[kind] = session
+            if kind == "query":
+                self._stats["load_seconds"] = round(time.perf_counter() - started, 3)
+            return session
+
+    def _load_model(self):
+        """Tokenizer, model file (quantized on request) and the model identity."""
+        from tokenizers import Tokenizer
+
+        self._ensure_model_files()
+
+        tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        tokenizer.enable_truncation(max_length=self.max_length)
+        tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        model_path = os.path.join(self.model_dir, "model.onnx")
+        fingerprint = model_fingerprint(model_path)
+        if self.quantize:
+            try:
+                model_path = quantized_model_path(self.model_dir, fingerprint)
+            except ImportError as e:
+                self.quantize = False
+                print(f"EMBEDDING_QUANTIZE needs the onnx package ({e}); using fp32 model")
+            except Exception as e:
+                self.quantize = False
+                print(f"Embedding quantization failed, using fp32 model: {e}")
+
+        self._tokenizer = tokenizer
+        self._model_path = model_path
+        # Vectors from a different model, precision or truncation are not comparable
+        self.model_id = f"{fingerprint}:{'int8' if self.quantize else 'fp32'}:{self.max_length}"
+
+    def identity(self) -> str:
+        """The model identity, loading the model files if needed."""
+        if self.model_id is None:
+            with self._load_lock:
+                if self._model_path is None:
+                    self._load_model()
+        return self.model_id
+
+    def _forward(self, texts: List[str], kind: str = "query") -> np.ndarray:
+        session = self._load(kind)
+        outputs = []
+        for start in range(0, len(texts), self.max_batch):
+            encodings = self._tokenizer.encode_batch(texts[start:start + self.max_batch])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            inputs = {
+                "input_ids": input_ids,
+                "attention_mask": attention_mask,
+                "token_type_ids": np.zeros_like(input_ids),
+            }
+            hidden = session.run(None, {k: v for k, v in inputs.items() if k in self._input_names})[0]
+
+            mask = attention_mask[..., None].astype(hidden.dtype)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+            outputs.append((pooled / np.clip(norms, 1e-12, None)).astype(np.float32))
+            self._stats["batches"] += 1
+        return np.concatenate(outputs) if outputs else np.zeros((0, 0), dtype=np.float32)
+
+    def _timed_forward(self, texts: List[str], kind: str = "query") -> np.ndarray:
+        with EMBEDDING_DURATION.time():
+            vectors = self._forward(texts, kind)
+        EMBEDDED_TEXTS.inc(len(texts))
+        return vectors
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._load_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._batch_loop, name="embedding-batcher", daemon=True)
+                    self._worker.start()
+
+    def _batch_loop(self):
+        while True:
+            pending = [self._queue.get()]
+            size = len(pending[0][0])
+            deadline = time.perf_counter() + self.batch_wait_ms / 1000
+            while size < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            texts = [text for item_texts, _ in pending for text in item_texts]
+            try:
+                vectors = self._timed_forward(texts)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+
+            if len(pending) > 1:
+                self._stats["coalesced_calls"] += len(pending)
+            offset = 0
+            for item_texts, future in pending:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+    def __call__(self, input: List[str]) -> List[np.ndarray]:
+        texts = list(input)
+        self._stats["calls"] += 1
+        self._stats["texts"] += len(texts)
+        if not texts:
+            return []
+
+        if len(texts) >= self.max_batch:
+            vectors = self._timed_forward(texts, "ingest")
+        elif self.batch_wait_ms <= 0:
+            vectors = self._timed_forward(texts)
+        else:
+            self._ensure_worker()
+            future: Future = Future()
+            self._queue.put((texts, future))
+            vectors = future.result()
+        return [np.array(v, dtype=np.float32) for v in vectors]
+
+    def warmup(self) -> float:
+        """Loads the model and runs one inference; returns seconds taken."""
+        started = time.perf_counter()
+        self._forward(["warmup"])
+        return round(time.perf_counter() - started, 3)
+
+    def stats(self) -> Dict:
+        return {
+            **self._stats,
+            "loaded": "query" in self._sessions,
+            "model_dir": self.model_dir,
+            "model_id": self.model_id,
+            "threads": self.threads,
+            "ingest_threads": self.ingest_threads,
+            "quantized": self.quantize,
+            "max_batch": self.max_batch,
+            "batch_wait_ms": self.batch_wait_ms,
+        }
+
+
+embedding_function = OnnxEmbeddingFunction()
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional
+
+import numpy as np
+
+from src.db.vector.embeddings import embedding_function
+
+# Max query embeddings kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "2048"))
+# Optional SQLite file that keeps query embeddings across restarts
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("QUERY_EMBEDDING_CACHE_PATH")
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query. The embedding model is uncased, so this is lossless."""
+    return " ".join(query.lower().split())
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query embeddings with optional disk persistence.
+    
+    Concurrent misses for the same query share one embedding call. Persisted
+    vectors are stored with the embedder's model identity; rows of any other
+    model are dropped when the file is opened.
+    """
+    
+    def __init__(self, embed_fn, max_size: int = QUERY_EMBEDDING_CACHE_SIZE, path: Optional[str] = None):
+        self.embed_fn = embed_fn
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        # Opened on first use: the model identity is known only once it is loaded
+        self.path = path
+        self.model_id = None
+        self._db = None
+        self._db_lock = threading.Lock()
+    
+    def _database(self) -> Optional[sqlite3.Connection]:
+        if self.path is None or self._db is not None:
+            return self._db
+        with self._db_lock:
+            if self._db is None:
+                identity = getattr(self.embed_fn, "identity", None)
+                model_id = identity() if identity else ""
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                columns = {row[1] for row in db.execute("PRAGMA table_info(query_embeddings)")}
+                if columns and "model" not in columns:
+                    # Written before rows recorded their model
+                    db.execute("DROP TABLE query_embeddings")
+                db.execute(
+                    """CREATE TABLE IF NOT EXISTS query_embeddings (
+                        model TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        vector BLOB NOT NULL,
+                        PRIMARY KEY (model, query)
+                    )"""
+                )
+                db.execute("DELETE FROM query_embeddings WHERE model != ?", (model_id,))
+                db.commit()
+                self.model_id = model_id
+                self._db = db
+        return self._db
+    
+    def get(self, query: str) -> List[float]:
+        key = normalize_query(query)
+        
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            vector = self._load(key)
+            if vector is None:
+                vector = [float(x) for x in self.embed_fn([key])[0]]
+                self._save(key, vector)
+                self.misses += 1
+            else:
+                self.hits += 1
+            
+            with self._lock:
+                self._entries[key] = vector
+                if len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            future.set_result(vector)
+            return vector
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+    
+    def _load(self, key: str):
+        db = self._database()
+        if db is None:
+            return None
+        with self._lock:
+            row = db.execute(
+                "SELECT vector FROM query_embeddings WHERE model = ? AND query = ?", (self.model_id, key)
+            ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32).tolist() if row else None
+    
+    def _save(self, key: str, vector: List[float]):
+        db = self._database()
+        if db is None:
+            return
+        with self._lock:
+            db.execute(
+                "INSERT OR REPLACE INTO query_embeddings (model, query, vector) VALUES (?, ?, ?)",
+                (self.model_id, key, np.asarray(vector, dtype=np.float32).tobytes())
+            )
+            db.commit()
+    
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    embedding_function,
+    path=QUERY_EMBEDDING_CACHE_PATH
+)
+
+
+def embed_query(query: str) -> List[float]:
+    """Embed a query once; repeated and identical queries are served from cache."""
+    return query_embedding_cache.get(query)
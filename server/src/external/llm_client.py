@@ -1,15 +1,274 @@
-from langchain_openai import ChatOpenAI 
+import asyncio
 import os 
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+import httpx
 from dotenv import load_dotenv
 
+from src.utils.metrics import LLM_DURATION, LLM_RETRIES, LLM_TOKENS
+from src.utils.tracing import span
+
 load_dotenv()
 
 
 API_KEY = os.getenv("API_KEY")
 
-llm = ChatOpenAI(
-    model="gpt-3.5-turbo",
-    temperature=0.7,
-    openai_api_key=API_KEY
-)
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+# Shared HTTP pool to the API
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "16"))
+# Completions allowed in flight at once, per process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+# Seconds per attempt
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+
+_limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+
+
+def build_llm():
+    """Create the chat model. langchain_openai is imported here, not at module load."""
+    from langchain_openai import ChatOpenAI
+    
+    return ChatOpenAI(
+        model=LLM_MODEL,
+        temperature=0.7,
+        openai_api_key=API_KEY,
+        timeout=LLM_TIMEOUT,
+        # Retries are handled by LLMClient so backoff and concurrency stay in one place
+        max_retries=0,
+        http_client=httpx.Client(limits=_limits, timeout=LLM_TIMEOUT),
+        http_async_client=httpx.AsyncClient(limits=_limits, timeout=LLM_TIMEOUT)
+    )
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx, timeouts and connection errors are worth retrying."""
+    # Imported here: the openai package is slow to load and only needed on errors
+    import openai
+    
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    """Jittered exponential backoff, honoring Retry-After when the API sends it."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(LLM_BACKOFF_MAX, float(retry_after))
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+
+def record_usage(prompt: str, response):
+    """Count tokens from the usage the API reported, estimating whatever is missing."""
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt_tokens = usage.get("input_tokens")
+    completion_tokens = usage.get("output_tokens")
+    if prompt_tokens is None or completion_tokens is None:
+        # Imported here: context_builder imports this module
+        from src.core.agent.context_builder import count_tokens
+        
+        if prompt_tokens is None:
+            prompt_tokens = count_tokens(prompt)
+        if completion_tokens is None:
+            completion_tokens = count_tokens(str(getattr(response, "content", "")))
+    LLM_TOKENS.inc(prompt_tokens, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, kind="completion")
+
+
+class LLMClient:
+    """Wraps the chat model with bounded concurrency, retries and single-flight.
+    
+    Identical prompts issued while one is already in flight share its result
+    instead of hitting the API again. Each caller still waits only within its
+    own deadline. Streaming callers opt out with ``coalesce=False``: tokens
+    reach only the callbacks of the caller that made the request. Without ``llm``, the model is created by ``llm_factory`` on
+    first use.
+    """
+    
+    def __init__(self, llm=None, llm_factory=build_llm, max_concurrency: int = LLM_MAX_CONCURRENCY, max_retries: int = LLM_MAX_RETRIES, timeout: float = LLM_TIMEOUT):
+        self._llm = llm
+        self._llm_factory = llm_factory
+        self._llm_lock = threading.Lock()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        # Asyncio primitives belong to one event loop, so each loop gets its own
+        self._loops = weakref.WeakKeyDictionary()
+        self._sync_semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._sync_inflight = {}
+        self._sync_lock = threading.Lock()
+        self.coalesced = 0
+        self.retries = 0
+    
+    @property
+    def llm(self):
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._llm_factory()
+        return self._llm
+    
+    @llm.setter
+    def llm(self, value):
+        self._llm = value
+    
+    @staticmethod
+    def _attempt_timeout(timeout: float, deadline: float = None) -> float:
+        """Timeout for one attempt, cut to what is left before ``deadline`` (a ``time.monotonic()`` value)."""
+        if deadline is None:
+            return timeout
+        left = deadline - time.monotonic()
+        if left <= 0:
+            raise asyncio.TimeoutError("LLM call deadline reached")
+        return min(timeout, left)
+    
+    def _can_retry(self, attempt: int, error: Exception, delay: float, deadline: float = None) -> bool:
+        if attempt == self.max_retries or not is_retryable(error):
+            return False
+        return deadline is None or time.monotonic() + delay < deadline
+    
+    @staticmethod
+    def _wait_budget(deadline: float = None):
+        """Seconds a caller joining a shared call may wait; None without a deadline."""
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+    
+    @staticmethod
+    def _outlasts(deadline: float, shared_deadline: float) -> bool:
+        """Whether a caller has time left after the shared call's deadline gave up."""
+        if shared_deadline is None:
+            return False
+        return deadline is None or deadline > shared_deadline
+    
+    def _loop_state(self) -> dict:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = {"semaphore": asyncio.Semaphore(self.max_concurrency), "inflight": {}}
+        return state
+    
+    async def ainvoke(self, prompt: str, timeout: float = None, deadline: float = None, coalesce: bool = True):
+        """Call the model; ``deadline`` bounds all attempts and backoff together."""
+        timeout = timeout or self.timeout
+        if not coalesce:
+            return await self._ainvoke_with_retries(prompt, timeout, deadline)
+        inflight = self._loop_state()["inflight"]
+        key = prompt
+        shared = inflight.get(key)
+        if shared is None:
+            task = asyncio.ensure_future(self._ainvoke_with_retries(prompt, timeout, deadline))
+            inflight[key] = (task, deadline)
+            task.add_done_callback(lambda _: inflight.pop(key, None))
+            # Shield so one cancelled caller does not cancel the shared call
+            return await asyncio.shield(task)
+        
+        self.coalesced += 1
+        task, shared_deadline = shared
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), self._wait_budget(deadline))
+        except asyncio.TimeoutError:
+            # The shared call ran out of its first caller's time, not ours
+            if task.done() and self._outlasts(deadline, shared_deadline):
+                return await self._ainvoke_with_retries(prompt, timeout, deadline)
+            raise
+    
+    async def _ainvoke_with_retries(self, prompt: str, timeout: float, deadline: float = None):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with span("llm.invoke", model=LLM_MODEL):
+                for attempt in range(self.max_retries + 1):
+                    attempt_timeout = self._attempt_timeout(timeout, deadline)
+                    try:
+                        async with self._loop_state()["semaphore"]:
+                            response = await asyncio.wait_for(self.llm.ainvoke(prompt), attempt_timeout)
+                    except Exception as e:
+                        delay = backoff_delay(attempt, e)
+                        if not self._can_retry(attempt, e, delay, deadline):
+                            raise
+                        self.retries += 1
+                        LLM_RETRIES.inc()
+                        await asyncio.sleep(delay)
+                    else:
+                        outcome = "ok"
+                        record_usage(prompt, response)
+                        return response
+        finally:
+            LLM_DURATION.observe(time.perf_counter() - started, outcome=outcome)
+    
+    def invoke(self, prompt: str, timeout: float = None, deadline: float = None):
+        timeout = timeout or self.timeout
+        key = prompt
+        with self._sync_lock:
+            shared = self._sync_inflight.get(key)
+            if shared is None:
+                future = Future()
+                self._sync_inflight[key] = (future, deadline)
+            else:
+                self.coalesced += 1
+        if shared is not None:
+            future, shared_deadline = shared
+            try:
+                return future.result(timeout=self._wait_budget(deadline))
+            except TimeoutError:
+                if future.done() and self._outlasts(deadline, shared_deadline):
+                    return self._invoke_with_retries(prompt, timeout, deadline)
+                raise
+        
+        try:
+            result = self._invoke_with_retries(prompt, timeout, deadline)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._sync_lock:
+                self._sync_inflight.pop(key, None)
+    
+    def _invoke_with_retries(self, prompt: str, timeout: float, deadline: float = None):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with span("llm.invoke", model=LLM_MODEL):
+                for attempt in range(self.max_retries + 1):
+                    attempt_timeout = self._attempt_timeout(timeout, deadline)
+                    try:
+                        with self._sync_semaphore:
+                            response = self.llm.invoke(prompt, timeout=attempt_timeout)
+                    except Exception as e:
+                        delay = backoff_delay(attempt, e)
+                        if not self._can_retry(attempt, e, delay, deadline):
+                            raise
+                        self.retries += 1
+                        LLM_RETRIES.inc()
+                        time.sleep(delay)
+                    else:
+                        outcome = "ok"
+                        record_usage(prompt, response)
+                        return response
+        finally:
+            LLM_DURATION.observe(time.perf_counter() - started, outcome=outcome)
+    
+    def stats(self) -> dict:
+        return {
+            "in_flight": sum(len(state["inflight"]) for state in list(self._loops.values())) + len(self._sync_inflight),
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "loaded": self._llm is not None
+        }
+
 
+llm_client = LLMClient()
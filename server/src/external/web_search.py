@@ -0,0 +1,338 @@
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import httpx
+
+from src.utils.metrics import WEB_SEARCH_RESULTS
+
+# "duckduckgo" or "stub" (canned local results, for offline runs and tests)
+WEB_SEARCH_PROVIDER = os.getenv("WEB_SEARCH_PROVIDER", "duckduckgo")
+DUCKDUCKGO_URL = os.getenv("DUCKDUCKGO_URL", "https://api.duckduckgo.com/")
+# Seconds per provider call; callers may cut it shorter with a deadline
+WEB_SEARCH_TIMEOUT = float(os.getenv("WEB_SEARCH_TIMEOUT", "3"))
+WEB_SEARCH_MAX_CONNECTIONS = int(os.getenv("WEB_SEARCH_MAX_CONNECTIONS", "16"))
+WEB_SEARCH_CACHE_TTL = float(os.getenv("WEB_SEARCH_CACHE_TTL", "900"))
+WEB_SEARCH_CACHE_SIZE = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "512"))
+# Consecutive failures (errors or calls slower than WEB_SEARCH_SLOW_SECONDS) that open the breaker
+WEB_SEARCH_BREAKER_FAILURES = int(os.getenv("WEB_SEARCH_BREAKER_FAILURES", "3"))
+# Seconds the breaker stays open before one trial call is let through
+WEB_SEARCH_BREAKER_RESET = float(os.getenv("WEB_SEARCH_BREAKER_RESET", "30"))
+WEB_SEARCH_SLOW_SECONDS = float(os.getenv("WEB_SEARCH_SLOW_SECONDS", "2.5"))
+WEB_SEARCH_STUB_LATENCY_MS = float(os.getenv("WEB_SEARCH_STUB_LATENCY_MS", "50"))
+WEB_SEARCH_STUB_FAILURE_RATE = float(os.getenv("WEB_SEARCH_STUB_FAILURE_RATE", "0"))
+
+# Results returned when the caller's deadline cut the search short
+TIMED_OUT = "Web search timed out."
+DEADLINE_REACHED = "Web search skipped: request deadline reached."
+
+_limits = httpx.Limits(max_connections=WEB_SEARCH_MAX_CONNECTIONS, max_keepalive_connections=WEB_SEARCH_MAX_CONNECTIONS)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class WebSearchProvider:
+    """A search backend. ``search``/``asearch`` return the result text and raise on failure."""
+
+    name = "base"
+
+    def search(self, query: str, timeout: float) -> str:
+        raise NotImplementedError
+
+    async def asearch(self, query: str, timeout: float) -> str:
+        raise NotImplementedError
+
+
+class DuckDuckGoProvider(WebSearchProvider):
+    """DuckDuckGo instant answer API over pooled HTTP clients."""
+
+    name = "duckduckgo"
+
+    def __init__(self, url: str = DUCKDUCKGO_URL):
+        self.url = url
+        self._client = None
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _params(query: str) -> dict:
+        return {"q": query, "format": "json", "no_html": 1, "skip_disambig": 1}
+
+    @staticmethod
+    def _format(query: str, data: dict) -> str:
+        if data.get('AbstractText'):
+            return f"Search result: {data['AbstractText']}"
+        elif data.get('Answer'):
+            return f"Answer: {data['Answer']}"
+        else:
+            return f"No specific answer found for: {query}"
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(limits=_limits)
+        return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        # An AsyncClient's pool belongs to one event loop, so keep one per loop
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = self._async_clients[loop] = httpx.AsyncClient(limits=_limits)
+        return client
+
+    def search(self, query: str, timeout: float) -> str:
+        response = self._sync_client().get(self.url, params=self._params(query), timeout=timeout)
+        response.raise_for_status()
+        return self._format(query, response.json())
+
+    async def asearch(self, query: str, timeout: float) -> str:
+        response = await self._async_client().get(self.url, params=self._params(query), timeout=timeout)
+        response.raise_for_status()
+        return self._format(query, response.json())
+
+
+class StubSearchProvider(WebSearchProvider):
+    """Canned results derived from the query after a fixed delay; no network.
+
+    ``failure_rate`` of the calls raise, to exercise the circuit breaker.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = WEB_SEARCH_STUB_LATENCY_MS, failure_rate: float = WEB_SEARCH_STUB_FAILURE_RATE):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    def _result(self, query: str) -> str:
+        self.calls += 1
+        digest = int(hashlib.md5(query.encode()).hexdigest()[:8], 16)
+        if digest % 10000 < self.failure_rate * 10000:
+            raise ConnectionError("stub provider failure")
+        return f"Search result: stub result #{digest % 1000} for {query}"
+
+    def search(self, query: str, timeout: float) -> str:
+        if self.latency_ms / 1000 > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("stub provider timed out")
+        time.sleep(self.latency_ms / 1000)
+        return self._result(query)
+
+    async def asearch(self, query: str, timeout: float) -> str:
+        await asyncio.sleep(self.latency_ms / 1000)
+        return self._result(query)
+
+
+PROVIDERS = {
+    "duckduckgo": DuckDuckGoProvider,
+    "stub": StubSearchProvider,
+}
+
+
+def build_provider(name: str = WEB_SEARCH_PROVIDER) -> WebSearchProvider:
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown web search provider: {name}. Allowed: {tuple(PROVIDERS)}")
+    return PROVIDERS[name]()
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider for a while.
+
+    Closed: calls go through. After ``failure_threshold`` consecutive
+    failures it opens and calls are refused for ``reset_timeout`` seconds,
+    then it is half-open: one trial call decides whether it closes again or
+    reopens. A call slower than ``slow_call_seconds`` counts as a failure.
+    """
+
+    def __init__(self, failure_threshold: int = WEB_SEARCH_BREAKER_FAILURES, reset_timeout: float = WEB_SEARCH_BREAKER_RESET, slow_call_seconds: float = WEB_SEARCH_SLOW_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.slow_call_seconds = slow_call_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record(self, ok: bool, elapsed: float):
+        with self._lock:
+            self._trial_in_flight = False
+            if ok and elapsed <= self.slow_call_seconds:
+                self._failures = 0
+                self._opened_at = None
+                return
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    self.times_opened += 1
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        retry_in = None
+        if self.state == "open":
+            retry_in = round(self.reset_timeout - (time.monotonic() - self._opened_at), 1)
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "times_opened": self.times_opened,
+            "retry_in_seconds": retry_in
+        }
+
+
+class WebSearchClient:
+    """Web search with a TTL cache, a circuit breaker and per-call deadlines.
+
+    Results are cached by normalized query for ``ttl`` seconds. Concurrent
+    async searches for the same query share one provider call. A caller's
+    ``deadline`` (a ``time.monotonic()`` value) caps how long it waits; the
+    shared call itself keeps running up to ``timeout`` and still fills the
+    cache. Failures come back as text, like the tool always returned, so a
+    failing provider never fails the chat.
+    """
+
+    def __init__(self, provider: WebSearchProvider = None, ttl: float = WEB_SEARCH_CACHE_TTL, max_size: int = WEB_SEARCH_CACHE_SIZE, timeout: float = WEB_SEARCH_TIMEOUT, breaker: CircuitBreaker = None):
+        self.provider = provider or build_provider()
+        self.ttl = ttl
+        self.max_size = max_size
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counts = {"hit": 0, "miss": 0, "coalesced": 0, "error": 0, "timeout": 0, "short_circuit": 0}
+
+    def _count(self, outcome: str):
+        self.counts[outcome] += 1
+        WEB_SEARCH_RESULTS.inc(outcome=outcome)
+
+    def _cached(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key: str, result: str):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def _remaining(self, deadline: Optional[float]) -> float:
+        if deadline is None:
+            return self.timeout
+        return min(self.timeout, deadline - time.monotonic())
+
+    def _finish(self, key: str, result: Optional[str], error: Optional[Exception], started: float) -> str:
+        self.breaker.record(error is None, time.monotonic() - started)
+        if error is not None:
+            self._count("timeout" if isinstance(error, (asyncio.TimeoutError, TimeoutError, httpx.TimeoutException)) else "error")
+            return f"Search failed: {str(error) or type(error).__name__}"
+        self._store(key, result)
+        return result
+
+    async def _fetch(self, query: str, key: str) -> str:
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(self.provider.asearch(query, self.timeout), self.timeout)
+        except Exception as e:
+            return self._finish(key, None, e, started)
+        return self._finish(key, result, None, started)
+
+    async def search(self, query: str, deadline: float = None) -> str:
+        key = normalize_query(query)
+        cached = self._cached(key)
+        if cached is not None:
+            self._count("hit")
+            return cached
+        remaining = self._remaining(deadline)
+        if remaining <= 0:
+            return DEADLINE_REACHED
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self._count("coalesced")
+        elif not self.breaker.allow():
+            self._count("short_circuit")
+            return "Web search is temporarily unavailable."
+        else:
+            self._count("miss")
+            task = asyncio.ensure_future(self._fetch(query, key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        try:
+            # Shield so a caller giving up does not cancel the shared call
+            return await asyncio.wait_for(asyncio.shield(task), remaining)
+        except asyncio.TimeoutError:
+            return TIMED_OUT
+
+    def search_sync(self, query: str, deadline: float = None) -> str:
+        """Blocking variant for the sync agent graph; no call sharing."""
+        key = normalize_query(query)
+        cached = self._cached(key)
+        if cached is not None:
+            self._count("hit")
+            return cached
+        remaining = self._remaining(deadline)
+        if remaining <= 0:
+            return DEADLINE_REACHED
+        if not self.breaker.allow():
+            self._count("short_circuit")
+            return "Web search is temporarily unavailable."
+
+        self._count("miss")
+        started = time.monotonic()
+        try:
+            result = self.provider.search(query, remaining)
+        except Exception as e:
+            return self._finish(key, None, e, started)
+        return self._finish(key, result, None, started)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "provider": self.provider.name,
+            "timeout_seconds": self.timeout,
+            "cache": {"size": len(self._entries), "max_size": self.max_size, "ttl_seconds": self.ttl},
+            "in_flight": len(self._inflight),
+            "circuit_breaker": self.breaker.stats(),
+            **self.counts
+        }
+
+
+web_search_client = WebSearchClient()
@@ -1,6 +1,6 @@
 #pydantic schemas lol
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
@@ -8,16 +8,26 @@ class ChatMessage(BaseModel):
     message: str
     session_id: str
     user_id: Optional[str] = "default_user"
+    latency_budget_ms: Optional[float] = Field(None, gt=0)  # overrides CHAT_LATENCY_BUDGET_MS
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
     sources: List[Dict[str, Any]]
     timestamp: datetime
+    timings: Optional[Dict[str, float]] = None  # stage -> milliseconds
+    cached: bool = False  # served from the semantic answer cache
+    prompt_tokens: Optional[Dict[str, int]] = None  # reasoning prompt size by section
+    degraded: Optional[List[str]] = None  # stages dropped or cut short to meet the latency budget
 
 class DocumentInfo(BaseModel):
     filename: str
     doc_type: str
     chunk_count: int
     upload_time: datetime
+    chunks_per_sec: Optional[float] = None
+    ingest_seconds: Optional[float] = None
+    file_hash: Optional[str] = None
+    embedded_count: Optional[int] = None  # chunks that needed a new embedding
+    deduplicated: bool = False  # identical file was already ingested
 
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+# Boot profiling: `python -m src.utils.boot [module] [top]` prints the modules
+# that dominate import time, from Python's own -X importtime output.
+
+
+class BootReport:
+    """Wall-clock timings of server import and each startup step."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return round(time.perf_counter() - self.started, 3)
+
+    def record(self, name: str, seconds: float):
+        with self._lock:
+            self.steps[name] = round(seconds, 3)
+
+    @contextmanager
+    def step(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self.errors[name] = str(e)
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def timed(self, name: str, func, *args, **kwargs):
+        """Call ``func`` inside ``step(name)``; usable with run_blocking."""
+        with self.step(name):
+            return func(*args, **kwargs)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {"steps": dict(self.steps), "errors": dict(self.errors)}
+
+    def format(self) -> str:
+        lines = [f"  {name:<24}{seconds:>8.3f}s" for name, seconds in self.steps.items()]
+        lines += [f"  {name:<24}  failed: {error}" for name, error in self.errors.items()]
+        return "Boot timings:\n" + "\n".join(lines)
+
+
+def import_time_report(module: str = "server", top: int = 25) -> List[Dict]:
+    """Import ``module`` in a fresh interpreter and return the slowest imports.
+
+    Rows are ``{"module", "self_ms", "cumulative_ms"}`` sorted by cumulative
+    time, so packages pulled in transitively show up under their top-level
+    importer.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else f"import {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    rows.sort(key=lambda row: row["cumulative_ms"], reverse=True)
+    return rows[:top]
+
+
+boot_report = BootReport()
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "server"
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    for row in import_time_report(target, limit):
+        print(f"{row['cumulative_ms']:>14.1f}{row['self_ms']:>10.1f}  {row['module']}")
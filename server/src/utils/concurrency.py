@@ -0,0 +1,36 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking work (Chroma queries, embeddings, file parsing) runs here so the
+# event loop stays free to serve other requests.
+BLOCKING_POOL_SIZE = int(os.getenv("BLOCKING_POOL_SIZE", "8"))
+
+blocking_pool = ThreadPoolExecutor(
+    max_workers=BLOCKING_POOL_SIZE,
+    thread_name_prefix="ragbot-blocking"
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking callable on the bounded pool and await its result."""
+    return await run_in_pool(blocking_pool, func, *args, **kwargs)
+
+
+async def run_in_pool(pool, func, *args, **kwargs):
+    """Await a blocking callable on ``pool``, in a copy of the caller's contextvars."""
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, func, *args, **kwargs)
+    return await loop.run_in_executor(pool, call)
+
+
+def submit_in_context(pool, func, *args, **kwargs):
+    """``pool.submit`` that runs ``func`` in a copy of the caller's contextvars.
+
+    Plain submit drops them, which would detach work from the active trace span.
+    """
+    ctx = contextvars.copy_context()
+    return pool.submit(ctx.run, func, *args, **kwargs)
@@ -1,23 +1,128 @@
-import PyPDF2
-from docx import Document as DocxDocument
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
 import xml.etree.ElementTree as ET
 from fastapi import HTTPException
 
 
+# Format-specific parsers (PyPDF2, python-docx) are imported on first use
+
+# Processes used for page-level PDF extraction, per server worker. The
+# default shares the cores between SERVER_WORKERS and stays at 4 or fewer.
+PDF_WORKERS = int(os.getenv(
+    "PDF_WORKERS",
+    str(max(1, min(4, (os.cpu_count() or 1) // int(os.getenv("SERVER_WORKERS", "1")))))
+))
+# Pages handed to one worker per task; smaller PDFs are extracted in-process
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Per worker process: the open PDF, reused by every task on the same file
+_worker_pdf = None
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Spawned, not forked: by now the server runs ONNX Runtime, Chroma and
+            # several thread pools, and forking a threaded process can deadlock
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pdf_worker
+            )
+        return _pdf_pool
+
+
+def _init_pdf_worker():
+    """Pool initializer: import the parser once per worker process."""
+    global _worker_pdf
+    import PyPDF2  # noqa: F401
+    
+    _worker_pdf = None
+
+
+def _open_pdf(file_path: str):
+    """The worker's reader for ``file_path``, opened on its first task for that file."""
+    global _worker_pdf
+    import PyPDF2
+    
+    stat = os.stat(file_path)
+    key = (file_path, stat.st_mtime_ns, stat.st_size)
+    if _worker_pdf is None or _worker_pdf[0] != key:
+        if _worker_pdf is not None:
+            _worker_pdf[1].close()
+        file = open(file_path, 'rb')
+        _worker_pdf = (key, file, PyPDF2.PdfReader(file))
+    return _worker_pdf[2]
+
+
+def _extract_pdf_pages(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text of pages [start, stop). Runs in a worker process."""
+    pdf_reader = _open_pdf(file_path)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
 
 
 class DocumentProcessor:
     @staticmethod
-    def process_pdf(file_path: str) -> str:
-        text = ""
+    def iter_pdf_pages(file_path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Yield (page_number, text) in page order, 1-based.
+        
+        Large PDFs are split into page ranges extracted on a process pool.
+        """
+        import PyPDF2
+        
+        workers = PDF_WORKERS if workers is None else workers
         with open(file_path, 'rb') as file:
             pdf_reader = PyPDF2.PdfReader(file)
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
-        return text
+            page_count = len(pdf_reader.pages)
+            if workers <= 1 or page_count <= PDF_PAGES_PER_TASK:
+                for i in range(page_count):
+                    yield i + 1, pdf_reader.pages[i].extract_text() or ""
+                return
+        
+        # A few ranges in flight per worker: pages are yielded as soon as the
+        # next range in order is done, and extracted text never piles up
+        pool = _get_pdf_pool()
+        ranges = iter(range(0, page_count, PDF_PAGES_PER_TASK))
+        pending = deque()
+        
+        def submit_next() -> None:
+            start = next(ranges, None)
+            if start is not None:
+                pending.append(pool.submit(
+                    _extract_pdf_pages, file_path, start, min(start + PDF_PAGES_PER_TASK, page_count)
+                ))
+        
+        for _ in range(workers * 2):
+            submit_next()
+        try:
+            page_number = 1
+            while pending:
+                texts = pending.popleft().result()
+                submit_next()
+                for text in texts:
+                    yield page_number, text
+                    page_number += 1
+        finally:
+            for future in pending:
+                future.cancel()
+
+    @staticmethod
+    def process_pdf(file_path: str) -> str:
+        return "".join(text + "\n" for _, text in DocumentProcessor.iter_pdf_pages(file_path))
 
     @staticmethod
     def process_docx(file_path: str) -> str:
+        from docx import Document as DocxDocument
+        
         doc = DocxDocument(file_path)
         text = ""
         for paragraph in doc.paragraphs:
@@ -60,5 +165,16 @@ def extract_text_from_file(file_path: str, filename: str) -> str:
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to process {filename}: {str(e)}")
 
-
-
+def extract_pages_from_file(file_path: str, filename: str) -> Iterator[Tuple[Optional[int], str]]:
+    """Yield (page_number, text) segments; page_number is None for unpaged formats."""
+    file_ext = filename.lower().split('.')[-1]
+    
+    if file_ext != 'pdf':
+        yield None, extract_text_from_file(file_path, filename)
+        return
+    
+    try:
+        for page_number, text in DocumentProcessor.iter_pdf_pages(file_path):
+            yield page_number, text + "\n"
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to process {filename}: {str(e)}")
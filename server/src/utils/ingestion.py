@@ -0,0 +1,241 @@
+import os
+import time
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import xxhash
+
+from src.db.vector.bulk import delete_ids, iter_ids_where
+from src.db.vector.chroma_client import get_chroma_client, get_doc_collection, embedding_function
+from src.db.sql.lexical_index import LexicalIndex
+from src.utils.metrics import INGEST_CHUNK_RATE, INGEST_CHUNKS, INGEST_DURATION
+from src.utils.text_splitter import text_splitter
+
+# Chunks embedded per batch; capped by Chroma's max batch size at write time
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+# Threads running the embedding model concurrently
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "4"))
+
+
+def iter_chunks(text: str) -> Iterator[Tuple[str, dict]]:
+    """Yield (chunk, extra metadata) pairs from the shared text splitter."""
+    for chunk in text_splitter.split_text(text):
+        yield chunk, {}
+
+
+def iter_page_chunks(pages: Iterable[Tuple[Optional[int], str]]) -> Iterator[Tuple[str, dict]]:
+    """Chunk paged text, tagging each chunk with the pages it spans.
+    
+    Pages are split as they arrive: each window is one page plus the last
+    ``chunk_overlap`` characters of the previous window, so memory stays
+    bounded by a page and chunks are yielded before later pages are read.
+    """
+    overlap = text_splitter._chunk_overlap
+    carry = ""
+    carry_starts: List[int] = []
+    carry_numbers: List[Optional[int]] = []
+    for page_number, text in pages:
+        if not text.strip():
+            continue
+        window = carry + text
+        page_starts = carry_starts + [len(carry)]
+        page_numbers = carry_numbers + [page_number]
+        
+        search_from = 0
+        for chunk in text_splitter.split_text(window):
+            start = window.find(chunk, search_from)
+            if 0 <= start and start + len(chunk) <= len(carry):
+                continue  # already inside the previous window's last chunk
+            if start < 0 or page_number is None:
+                yield chunk, {}
+                continue
+            end = start + len(chunk) - 1
+            search_from = start + 1
+            yield chunk, {
+                "page": page_numbers[bisect_right(page_starts, start) - 1],
+                "page_end": page_numbers[bisect_right(page_starts, end) - 1]
+            }
+        
+        tail = max(0, len(window) - overlap)
+        first = bisect_right(page_starts, tail) - 1
+        carry = window[tail:]
+        carry_starts = [0] + [s - tail for s in page_starts[first + 1:]]
+        carry_numbers = page_numbers[first:]
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def content_hash(data) -> str:
+    """Stable content hash used for file and chunk deduplication."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return xxhash.xxh3_128_hexdigest(data)
+
+
+def chunk_id(filename: str, chunk_index: int, chunk_hash: str, file_hash: Optional[str] = None) -> str:
+    """Deterministic chunk id, so re-ingesting the same file writes nothing new.
+    
+    The id includes the file, so text shared by several files is stored once
+    per file (each row carries its own filename for deletes and citations);
+    only its embedding is computed once.
+    """
+    key = "\0".join([filename, file_hash or "", str(chunk_index), chunk_hash])
+    return f"chunk_{content_hash(key)}"
+
+
+def remove_stale_versions(filename: str, file_hash: str) -> int:
+    """Delete chunks of earlier versions of a file, returning how many were removed."""
+    doc_collection = get_doc_collection()
+    # $ne also matches chunks stored before file hashes existed. Ids are
+    # collected before deleting, since deletes would shift the pages.
+    stale = {"$and": [{"filename": filename}, {"file_hash": {"$ne": file_hash}}]}
+    stale_ids = [id_ for ids in iter_ids_where(doc_collection, stale) for id_ in ids]
+    if stale_ids:
+        delete_ids(doc_collection, stale_ids)
+        LexicalIndex.delete_ids(stale_ids)
+    return len(stale_ids)
+
+
+def _known_embeddings(hashes: List[str]) -> dict:
+    """Map content hash -> stored embedding for chunks already in the collection."""
+    if not hashes:
+        return {}
+    results = get_doc_collection().get(
+        where={"content_hash": {"$in": hashes}},
+        include=["embeddings", "metadatas"]
+    )
+    known = {}
+    for embedding, metadata in zip(results["embeddings"], results["metadatas"]):
+        known.setdefault(metadata["content_hash"], embedding)
+    return known
+
+
+def ingest_chunks(
+    chunks: Iterable[Tuple[str, dict]],
+    filename: str,
+    file_type: str,
+    batch_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    file_hash: Optional[str] = None
+) -> dict:
+    """Embed (chunk, extra metadata) pairs on a worker pool and store them.
+    
+    Chunks are pulled lazily into fixed-size batches. At most ``2 * workers``
+    batches are in flight, so memory stays bounded regardless of file size,
+    and Chroma writes overlap with embedding of the following batches.
+    
+    Chunks are content-addressed: ids already present are skipped, and
+    chunks whose text is already stored (under any file) reuse the stored
+    embedding instead of being embedded again.
+    """
+    doc_collection = get_doc_collection()
+    batch_size = max(1, min(batch_size or INGEST_BATCH_SIZE, get_chroma_client().get_max_batch_size()))
+    workers = max(1, workers or INGEST_WORKERS)
+    upload_time = datetime.now().isoformat()
+    started = time.perf_counter()
+    
+    stats = {"chunk_count": 0, "embedded_count": 0, "reused_count": 0, "skipped_count": 0}
+    batch_count = 0
+    pending = deque()
+    
+    def embed_missing(texts_by_hash: dict) -> dict:
+        hashes = list(texts_by_hash)
+        if not hashes:
+            return {}
+        return dict(zip(hashes, embedding_function([texts_by_hash[h] for h in hashes])))
+    
+    def write_oldest():
+        records, known, future = pending.popleft()
+        if not records:
+            return
+        embedded = future.result()
+        doc_collection.add(
+            ids=[record["id"] for record in records],
+            embeddings=[
+                known[record["hash"]] if record["hash"] in known else embedded[record["hash"]]
+                for record in records
+            ],
+            documents=[record["chunk"] for record in records],
+            metadatas=[record["metadata"] for record in records]
+        )
+        LexicalIndex.add([
+            {"id": record["id"], "content": record["chunk"], "metadata": record["metadata"]}
+            for record in records
+        ])
+    
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ragbot-ingest") as pool:
+        for batch in batched(enumerate(chunks), batch_size):
+            records = []
+            for i, (chunk, extra) in batch:
+                chunk_hash = content_hash(chunk)
+                metadata = {
+                    "filename": filename,
+                    "chunk_index": i,
+                    "upload_time": upload_time,
+                    "file_type": file_type,
+                    "content_hash": chunk_hash,
+                    **extra
+                }
+                if file_hash:
+                    metadata["file_hash"] = file_hash
+                records.append({
+                    "id": chunk_id(filename, i, chunk_hash, file_hash),
+                    "hash": chunk_hash,
+                    "chunk": chunk,
+                    "metadata": metadata
+                })
+            stats["chunk_count"] += len(records)
+            
+            # Skip chunks that are already stored under the same id
+            existing_ids = set(doc_collection.get(ids=[r["id"] for r in records], include=[])["ids"])
+            records = [r for r in records if r["id"] not in existing_ids]
+            stats["skipped_count"] += len(existing_ids)
+            
+            # Reuse embeddings of identical text, embed the rest once per batch
+            known = _known_embeddings(list({r["hash"] for r in records}))
+            missing = {r["hash"]: r["chunk"] for r in records if r["hash"] not in known}
+            stats["reused_count"] += sum(1 for r in records if r["hash"] in known)
+            stats["embedded_count"] += len(missing)
+            
+            pending.append((records, known, pool.submit(embed_missing, missing)))
+            batch_count += 1
+            if len(pending) >= 2 * workers:
+                write_oldest()
+        while pending:
+            write_oldest()
+    
+    elapsed = time.perf_counter() - started
+    INGEST_DURATION.observe(elapsed)
+    for result in ("embedded", "reused", "skipped"):
+        INGEST_CHUNKS.inc(stats[f"{result}_count"], result=result)
+    if elapsed > 0:
+        INGEST_CHUNK_RATE.set(stats["chunk_count"] / elapsed)
+    return {
+        **stats,
+        "batch_count": batch_count,
+        "batch_size": batch_size,
+        "workers": workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "chunks_per_sec": round(stats["chunk_count"] / elapsed, 1) if elapsed > 0 else None
+    }
+
+
+def ingest_text(text: str, filename: str, file_type: str, batch_size: Optional[int] = None, workers: Optional[int] = None, file_hash: Optional[str] = None) -> dict:
+    """Split text into chunks and ingest them."""
+    return ingest_chunks(iter_chunks(text), filename, file_type, batch_size=batch_size, workers=workers, file_hash=file_hash)
+
+
+def ingest_pages(pages: Iterable[Tuple[Optional[int], str]], filename: str, file_type: str, batch_size: Optional[int] = None, workers: Optional[int] = None, file_hash: Optional[str] = None) -> dict:
+    """Chunk paged text (page numbers land in chunk metadata) and ingest it."""
+    return ingest_chunks(iter_page_chunks(pages), filename, file_type, batch_size=batch_size, workers=workers, file_hash=file_hash)
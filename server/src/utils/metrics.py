@@ -0,0 +1,221 @@
+"""Process-local metrics exported in the Prometheus text format on /metrics.
+
+prometheus_client is not a dependency; the counters, gauges and histograms
+needed here are small enough to keep in-house. Every metric registers itself
+on creation and ``render()`` writes them all out.
+
+Values live in the process that recorded them. With several server workers
+each one has its own, so every worker has to be scraped and the series summed
+in Prometheus; there is no shared multiprocess store as in prometheus_client.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+from src.utils.tracing import span
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans Chroma lookups (ms) up to slow LLM calls and ingests
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: Dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(list(zip(self.labelnames, key)))} {_number(value)}" for key, value in items]
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._samples()
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket (not yet cumulative) counts, then sum and count
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels(pairs + [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(pairs)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(pairs)} {count}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def timed(histogram: Histogram, span_name: str, **labels):
+    """Time a block into ``histogram`` and, when tracing is on, a span of the same scope."""
+    with span(span_name, **labels), histogram.time(**labels):
+        yield
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "ragbot_http_request_duration_seconds", "HTTP request latency, including streamed bodies",
+    ("method", "route", "status")
+)
+NODE_DURATION = Histogram("ragbot_node_duration_seconds", "Agent graph node latency", ("node",))
+RETRIEVAL_DURATION = Histogram(
+    "ragbot_retrieval_duration_seconds", "Retrieval latency per context source", ("source", "outcome")
+)
+TOOL_DURATION = Histogram("ragbot_tool_duration_seconds", "Agent tool latency", ("tool",))
+CHROMA_DURATION = Histogram(
+    "ragbot_chroma_duration_seconds", "Chroma collection operation latency", ("collection", "operation")
+)
+EMBEDDING_DURATION = Histogram("ragbot_embedding_batch_duration_seconds", "Embedding model forward pass latency")
+EMBEDDED_TEXTS = Counter("ragbot_embedded_texts_total", "Texts run through the embedding model")
+LLM_DURATION = Histogram(
+    "ragbot_llm_request_duration_seconds", "Chat model call latency, including retries", ("outcome",)
+)
+LLM_TOKENS = Counter("ragbot_llm_tokens_total", "Chat model tokens, reported by the API or estimated", ("kind",))
+LLM_RETRIES = Counter("ragbot_llm_retries_total", "Chat model calls retried after a transient error")
+WEB_SEARCH_RESULTS = Counter(
+    "ragbot_web_search_total", "Web searches by outcome (hit, miss, coalesced, error, timeout, short_circuit)",
+    ("outcome",)
+)
+DEGRADED_STAGES = Counter(
+    "ragbot_degraded_stages_total", "Chat stages dropped or cut short to stay within the latency budget",
+    ("stage",)
+)
+INGEST_DURATION = Histogram("ragbot_ingest_duration_seconds", "Time to chunk, embed and store one document")
+INGEST_CHUNKS = Counter(
+    "ragbot_ingest_chunks_total", "Ingested chunks by how they were stored (embedded, reused or skipped)",
+    ("result",)
+)
+INGEST_CHUNK_RATE = Gauge("ragbot_ingest_chunks_per_second", "Chunk throughput of the most recent ingest")
+
+
+class MetricsMiddleware:
+    """ASGI middleware: one latency sample and one root span per HTTP request.
+
+    Pure ASGI rather than BaseHTTPMiddleware so streamed responses are timed
+    to their last chunk. Requests are labelled by route template, not raw
+    path, to keep label cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with span(f"{scope['method']} {scope['path']}", **{"http.method": scope["method"], "http.target": scope["path"]}) as current:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                route_path = getattr(route, "path", "unmatched")
+                if current is not None:
+                    current.update_name(f"{scope['method']} {route_path}")
+                    current.set_attribute("http.route", route_path)
+                    current.set_attribute("http.status_code", status["code"])
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"], route=route_path, status=status["code"]
+                )
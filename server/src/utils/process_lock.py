@@ -0,0 +1,60 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: the server runs a single worker there
+    fcntl = None
+
+# Lock files shared by the worker processes of one server
+LOCK_DIR = os.getenv("LOCK_DIR", "./data/locks")
+
+
+class FileLock:
+    """An exclusive lock across processes, held on a file under LOCK_DIR.
+
+    Used as a context manager it blocks until acquired. ``acquire(blocking=False)``
+    tries once, for work that only one worker should do. The OS releases the
+    lock if its process dies, so another worker can take over. Without fcntl
+    every acquire succeeds.
+    """
+
+    def __init__(self, name: str, lock_dir: str = LOCK_DIR):
+        self.path = os.path.join(lock_dir, f"{name}.lock")
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def acquire(self, blocking: bool = True) -> bool:
+        with self._lock:
+            if self._file is not None:
+                return True
+            if fcntl is None:
+                self._file = True
+                return True
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            lock_file = open(self.path, "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except OSError:
+                lock_file.close()
+                return False
+            self._file = lock_file
+            return True
+
+    def release(self):
+        with self._lock:
+            if self._file is not None and self._file is not True:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+                self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
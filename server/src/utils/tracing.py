@@ -0,0 +1,62 @@
+"""Optional OpenTelemetry tracing.
+
+Off unless OTEL_ENABLED=true, or OTEL_EXPORTER_OTLP_ENDPOINT is set. Spans go
+to the OTLP gRPC exporter, configured by the standard OTEL_EXPORTER_OTLP_*
+variables. The active span lives in a contextvar, which run_blocking copies
+into pool threads, so node, tool and Chroma spans nest under the span of the
+request that caused them. With tracing off, ``span`` costs one branch.
+"""
+import os
+from contextlib import contextmanager
+
+OTEL_ENABLED = os.getenv(
+    "OTEL_ENABLED", "true" if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT") else "false"
+).lower() == "true"
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "ragbot-server")
+
+_tracer = None
+_provider = None
+
+
+def init_tracing() -> bool:
+    """Install the tracer provider and exporter; the SDK is imported only when enabled."""
+    global _tracer, _provider
+    if not OTEL_ENABLED or _tracer is not None:
+        return _tracer is not None
+
+    from opentelemetry import trace
+    from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+    _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("ragbot")
+    return True
+
+
+def shutdown_tracing():
+    """Flush buffered spans; called when the server stops."""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _tracer = _provider = None
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """A span around the ``with`` block, or nothing when tracing is off.
+
+    Yields the span (None when off). Exceptions are recorded on the span.
+    """
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes={k: v for k, v in attributes.items() if v is not None}) as current:
+        yield current
+
+
+def tracing_stats() -> dict:
+    return {"enabled": _tracer is not None, "service_name": OTEL_SERVICE_NAME if OTEL_ENABLED else None}
@@ -0,0 +1,32 @@
+"""Shared setup: the server modules run against the benchmark stand-ins.
+
+Stores use paths relative to the working directory, so the session runs in
+a scratch directory; the chat model and web search are fakes and embeddings
+are hashing vectors, so no network or model files are needed.
+"""
+import os
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+# Read at import time by the modules under test
+os.environ.setdefault("API_KEY", "test")
+os.environ.setdefault("MEMORY_COMPACTION_INTERVAL", "0")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stand_ins(tmp_path_factory):
+    from benchmarks import fakes
+    from src.db.vector.embeddings import embedding_function
+
+    workdir = tmp_path_factory.mktemp("ragbot")
+    previous = os.getcwd()
+    os.chdir(workdir)
+    llm, web = fakes.install(llm_latency_ms=0, llm_jitter_ms=0, web_latency_ms=0, embeddings="hash")
+    # Identity of the hashing vectors, so the query cache never loads the model
+    embedding_function.model_id = "hash"
+    yield {"llm": llm, "web": web, "workdir": workdir}
+    os.chdir(previous)
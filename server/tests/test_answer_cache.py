@@ -0,0 +1,48 @@
+from src.core.cache.answer_cache import SHARED_SCOPE, AnswerCache
+from src.db.sql.session_index import SessionIndex
+
+QUERY = "how do I configure the backup schedule"
+
+
+def test_hit_for_the_same_query_and_corpus():
+    cache = AnswerCache(threshold=0.95, ttl=60, max_size=10, enabled=True)
+    cache.store(QUERY, "Use the scheduler page.", [], corpus_version=1)
+
+    hit = cache.lookup(QUERY, corpus_version=1)
+
+    assert hit["response"] == "Use the scheduler page."
+    assert cache.lookup(QUERY, corpus_version=2) is None
+
+
+def test_answers_are_scoped():
+    cache = AnswerCache(threshold=0.95, ttl=60, max_size=10, enabled=True)
+    cache.store(QUERY, "From session one's history.", [], corpus_version=1, scope="session-1")
+
+    assert cache.lookup(QUERY, 1, scope="session-2") is None
+    assert cache.lookup(QUERY, 1, scope=SHARED_SCOPE) is None
+    assert cache.lookup(QUERY, 1, scope="session-1")["response"] == "From session one's history."
+
+
+def test_only_new_sessions_share_answers():
+    SessionIndex.record_turns("active-session", "user", 2, "2024-01-01T00:00:00")
+
+    assert AnswerCache.session_scope("brand-new-session") == SHARED_SCOPE
+    assert AnswerCache.session_scope("active-session") == "active-session"
+
+
+def test_time_sensitive_queries_bypass_the_cache():
+    cache = AnswerCache(threshold=0.95, ttl=60, max_size=10, enabled=True)
+    cache.store("what is today's date", "Monday", [], corpus_version=1)
+
+    assert cache.lookup("what is today's date", corpus_version=1) is None
+    assert cache.stats()["size"] == 0
+    assert cache.bypassed == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(threshold=0.95, ttl=60, max_size=2, enabled=True)
+    for i, query in enumerate(["alpha setup guide", "beta release notes", "gamma install steps"]):
+        cache.store(query, f"answer {i}", [], corpus_version=1)
+
+    assert cache.lookup("alpha setup guide", 1) is None
+    assert cache.lookup("gamma install steps", 1)["response"] == "answer 2"
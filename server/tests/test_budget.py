@@ -0,0 +1,77 @@
+import asyncio
+import math
+import time
+
+import pytest
+
+from src.core.agent import budget
+from src.core.agent.nodes.reasoning_node import reasoning_node_async
+
+
+def state_with(seconds_left=None, **extra):
+    deadline = None if seconds_left is None else time.monotonic() + seconds_left
+    return {
+        "messages": [{"role": "user", "content": "what does the manual say?"}],
+        "session_id": "budget",
+        "user_query": "what does the manual say?",
+        "context": "",
+        "response": "",
+        "tool_calls": [],
+        "timings": {},
+        "retrieved": [],
+        "prompt_tokens": {},
+        "deadline": deadline,
+        "degraded": [],
+        **extra
+    }
+
+
+def test_no_deadline_is_unbounded():
+    assert budget.remaining({}) == math.inf
+    assert budget.stage_timeout({}, cap=2.0, reserve_ms=5000) == 2.0
+
+
+def test_stage_timeout_keeps_the_reserve():
+    timeout = budget.stage_timeout(state_with(20), cap=30.0, reserve_ms=5000)
+
+    assert 14.5 < timeout <= 15.0
+
+
+def test_stage_timeout_splits_a_small_budget():
+    # Reserve larger than what is left: the stage still gets half
+    timeout = budget.stage_timeout(state_with(1.0), cap=30.0, reserve_ms=5000)
+
+    assert 0.45 < timeout <= 0.5
+
+
+def test_stage_timeout_is_capped():
+    assert budget.stage_timeout(state_with(60), cap=2.0) == 2.0
+
+
+def test_degrade_lists_each_stage_once():
+    state = {"degraded": ["web_search"]}
+
+    assert budget.degrade(state, "web_search", "reasoning") == ["web_search", "reasoning"]
+    assert state["degraded"] == ["web_search"]
+
+
+def test_reasoning_falls_back_without_time_for_the_llm(stand_ins):
+    calls = stand_ins["llm"].calls
+    state = state_with(0.1, retrieved=[{"source": "documents", "content": "The manual says to reboot."}])
+
+    result = asyncio.run(reasoning_node_async(state))
+
+    assert stand_ins["llm"].calls == calls
+    assert result["degraded"] == ["reasoning"]
+    assert "The manual says to reboot." in result["response"]
+
+
+@pytest.mark.parametrize("seconds_left", [None, 30])
+def test_reasoning_calls_the_llm_with_time_left(stand_ins, seconds_left):
+    calls = stand_ins["llm"].calls
+
+    result = asyncio.run(reasoning_node_async(state_with(seconds_left)))
+
+    assert stand_ins["llm"].calls == calls + 1
+    assert result["response"]
+    assert not result["degraded"]
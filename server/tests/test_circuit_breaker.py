@@ -0,0 +1,61 @@
+import time
+
+from src.external.web_search import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, slow_call_seconds=5)
+
+    breaker.record(False, 0.1)
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record(False, 0.1)
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.times_opened == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60, slow_call_seconds=5)
+
+    breaker.record(False, 0.1)
+    breaker.record(True, 0.1)
+    breaker.record(False, 0.1)
+
+    assert breaker.state == "closed"
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, slow_call_seconds=0.5)
+
+    breaker.record(True, 2.0)
+
+    assert breaker.state == "open"
+
+
+def test_half_open_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05, slow_call_seconds=5)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+
+def test_trial_outcome_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05, slow_call_seconds=5)
+    breaker.record(False, 0.1)
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(False, 0.1)
+
+    assert breaker.state == "open"
+    assert breaker.times_opened == 1
+
+    time.sleep(0.06)
+    breaker.allow()
+    breaker.record(True, 0.1)
+
+    assert breaker.state == "closed"
+    assert breaker.allow()
@@ -0,0 +1,72 @@
+from src.core.agent.context_builder import count_tokens, dedupe_chunks, fit_chunks
+
+SHARED = "the shared sentence that both neighbouring chunks contain"
+
+
+def chunk(content, index=None, distance=0.5, filename="doc.txt"):
+    metadata = {"filename": filename}
+    if index is not None:
+        metadata["chunk_index"] = index
+    return {"content": content, "metadata": metadata, "distance": distance}
+
+
+def test_dedupe_drops_repeated_text():
+    chunks = [chunk("same  text\nhere"), chunk("same text here"), chunk("other text")]
+
+    assert [c["content"] for c in dedupe_chunks(chunks)] == ["same  text\nhere", "other text"]
+
+
+def test_dedupe_trims_overlap_from_the_less_relevant_neighbour():
+    first = chunk(f"opening words {SHARED}", index=0, distance=0.1)
+    second = chunk(f"{SHARED} closing words", index=1, distance=0.4)
+
+    deduped = dedupe_chunks([first, second])
+
+    assert deduped[0]["content"] == first["content"]
+    assert deduped[1]["content"] == "closing words"
+
+
+def test_dedupe_keeps_overlap_in_the_more_relevant_neighbour():
+    first = chunk(f"opening words {SHARED}", index=0, distance=0.4)
+    second = chunk(f"{SHARED} closing words", index=1, distance=0.1)
+
+    deduped = dedupe_chunks([first, second])
+
+    assert deduped[0]["content"] == "opening words"
+    assert deduped[1]["content"] == second["content"]
+
+
+def test_dedupe_leaves_chunks_of_other_files_alone():
+    first = chunk(f"opening words {SHARED}", index=0, filename="a.txt")
+    second = chunk(f"{SHARED} closing words", index=1, filename="b.txt")
+
+    assert [c["content"] for c in dedupe_chunks([first, second])] == [first["content"], second["content"]]
+
+
+def test_fit_chunks_takes_most_relevant_first():
+    chunks = [chunk("low " * 40, distance=0.9), chunk("high " * 40, distance=0.1)]
+    budget = count_tokens(chunks[1]["content"])
+
+    selected, used = fit_chunks(chunks, budget)
+
+    assert [c["content"] for c in selected] == [chunks[1]["content"]]
+    assert used == budget
+
+
+def test_fit_chunks_truncates_the_first_chunk_that_does_not_fit():
+    long_text = ". ".join(f"sentence number {i} of the long chunk" for i in range(200))
+    selected, used = fit_chunks([chunk(long_text)], 100)
+
+    assert len(selected) == 1
+    assert selected[0]["truncated"]
+    assert used == selected[0]["tokens"] <= 100
+
+
+def test_fit_chunks_drops_what_is_too_small_to_be_useful():
+    first = chunk("word " * 100, distance=0.1)
+    second = chunk("word " * 100, distance=0.2)
+    budget = count_tokens(first["content"]) + 5
+
+    selected, _ = fit_chunks([first, second], budget)
+
+    assert len(selected) == 1
@@ -0,0 +1,89 @@
+from src.utils.ingestion import content_hash, ingest_text, iter_page_chunks, remove_stale_versions
+from src.db.vector.chroma_client import get_doc_collection
+from src.db.sql.lexical_index import LexicalIndex
+
+
+def words(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix}w{i}" for i in range(count))
+
+
+def test_page_chunks_carry_page_numbers():
+    pages = [(page, words(f"p{page}", 300) + "\n") for page in range(1, 4)]
+    chunks = list(iter_page_chunks(pages))
+
+    assert chunks
+    for chunk, metadata in chunks:
+        first, last = chunk.split()[0], chunk.split()[-1]
+        assert metadata["page"] == int(first[1:first.index("w")])
+        assert metadata["page_end"] == int(last[1:last.index("w")])
+
+
+def test_page_chunks_span_page_boundaries():
+    # Pages without a trailing newline run into each other mid-chunk
+    pages = [(1, words("p1", 20) + " "), (2, words("p2", 20) + " "), (3, words("p3", 20))]
+    chunks = list(iter_page_chunks(pages))
+
+    assert (1, 3) in {(metadata["page"], metadata["page_end"]) for _, metadata in chunks}
+    text = " ".join(chunk for chunk, _ in chunks)
+    for page in range(1, 4):
+        assert all(word in text for word in words(f"p{page}", 20).split())
+
+
+def test_page_chunks_do_not_repeat_the_carried_overlap():
+    pages = [(page, words(f"p{page}", 300) + "\n") for page in range(1, 4)]
+    chunks = [chunk for chunk, _ in iter_page_chunks(pages)]
+
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk not in previous
+
+
+def test_unpaged_text_has_no_page_metadata():
+    assert list(iter_page_chunks([(None, "plain text")])) == [("plain text", {})]
+
+
+def test_blank_pages_are_skipped():
+    chunks = list(iter_page_chunks([(1, "first"), (2, "  \n"), (3, "third")]))
+
+    assert chunks[0] == ("first", {"page": 1, "page_end": 1})
+    assert all(metadata["page"] != 2 for _, metadata in chunks)
+
+
+def test_content_hash_is_stable_across_types():
+    assert content_hash("chunk") == content_hash(b"chunk")
+    assert content_hash("chunk") != content_hash("chunk ")
+
+
+def test_reingesting_a_file_writes_nothing_new():
+    text = "\n\n".join(words(f"dedup{i}", 150) for i in range(4))
+
+    first = ingest_text(text, "dedup.txt", "txt", file_hash="v1")
+    second = ingest_text(text, "dedup.txt", "txt", file_hash="v1")
+
+    assert first["embedded_count"] == first["chunk_count"] > 1
+    assert second["skipped_count"] == second["chunk_count"]
+    assert second["embedded_count"] == second["reused_count"] == 0
+
+
+def test_identical_text_reuses_stored_embeddings():
+    text = "\n\n".join(words(f"shared{i}", 150) for i in range(3))
+
+    ingest_text(text, "shared-a.txt", "txt", file_hash="a")
+    copy = ingest_text(text, "shared-b.txt", "txt", file_hash="b")
+
+    assert copy["embedded_count"] == 0
+    assert copy["reused_count"] == copy["chunk_count"]
+
+
+def test_new_version_replaces_the_old_one():
+    collection = get_doc_collection()
+    ingest_text(words("old", 400), "versioned.txt", "txt", file_hash="v1")
+    new = ingest_text(words("new", 400), "versioned.txt", "txt", file_hash="v2")
+
+    removed = remove_stale_versions("versioned.txt", "v2")
+
+    stored = collection.get(where={"filename": "versioned.txt"}, include=["metadatas"])
+    assert removed > 0
+    assert len(stored["ids"]) == new["chunk_count"]
+    assert {metadata["file_hash"] for metadata in stored["metadatas"]} == {"v2"}
+    assert not LexicalIndex.search("oldw1")
+    assert LexicalIndex.search("neww1")
@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.external import llm_client as llm_module
+from src.external.llm_client import LLMClient
+
+
+class Reply:
+    def __init__(self, content):
+        self.content = content
+        self.usage_metadata = {"input_tokens": 1, "output_tokens": 1}
+
+
+class ScriptedModel:
+    """Answers after ``delay`` seconds; the first ``failures`` calls time out."""
+
+    def __init__(self, delay=0.0, failures=0):
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    async def ainvoke(self, prompt):
+        call = self._next()
+        await asyncio.sleep(self.delay)
+        if call <= self.failures:
+            raise asyncio.TimeoutError("scripted failure")
+        return Reply(f"{prompt} #{call}")
+
+    def invoke(self, prompt, timeout=None):
+        call = self._next()
+        time.sleep(self.delay)
+        if call <= self.failures:
+            raise TimeoutError("scripted failure")
+        return Reply(f"{prompt} #{call}")
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm_module, "LLM_BACKOFF_BASE", 0.001)
+
+
+def test_retries_retryable_errors():
+    model = ScriptedModel(failures=2)
+    client = LLMClient(llm=model, max_retries=3)
+
+    assert asyncio.run(client.ainvoke("q")).content == "q #3"
+    assert client.retries == 2
+
+
+def test_gives_up_after_max_retries():
+    client = LLMClient(llm=ScriptedModel(failures=5), max_retries=1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.ainvoke("q"))
+    assert client.retries == 1
+
+
+def test_does_not_retry_past_the_deadline():
+    model = ScriptedModel(delay=0.05, failures=5)
+    client = LLMClient(llm=model, max_retries=10)
+
+    started = time.monotonic()
+    with pytest.raises((asyncio.TimeoutError, TimeoutError)):
+        asyncio.run(client.ainvoke("q", deadline=time.monotonic() + 0.2))
+
+    assert time.monotonic() - started < 0.5
+    assert model.calls < 10
+
+
+def test_identical_prompts_share_one_call():
+    model = ScriptedModel(delay=0.05)
+    client = LLMClient(llm=model)
+
+    async def run():
+        return await asyncio.gather(*[client.ainvoke("q") for _ in range(3)])
+
+    replies = asyncio.run(run())
+
+    assert model.calls == 1
+    assert {reply.content for reply in replies} == {"q #1"}
+    assert client.coalesced == 2
+
+
+def test_streaming_callers_are_not_coalesced():
+    model = ScriptedModel(delay=0.05)
+    client = LLMClient(llm=model)
+
+    async def run():
+        return await asyncio.gather(*[client.ainvoke("q", coalesce=False) for _ in range(3)])
+
+    asyncio.run(run())
+
+    assert model.calls == 3
+    assert client.coalesced == 0
+
+
+def test_joiner_waits_only_within_its_own_deadline():
+    model = ScriptedModel(delay=0.3)
+    client = LLMClient(llm=model)
+
+    async def run():
+        leader = asyncio.ensure_future(client.ainvoke("q"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.ainvoke("q", deadline=time.monotonic() + 0.05)
+        return await leader
+
+    assert asyncio.run(run()).content == "q #1"
+    assert model.calls == 1
+
+
+def test_joiner_outlasting_the_shared_call_retries_on_its_own():
+    model = ScriptedModel(delay=0.1)
+    client = LLMClient(llm=model)
+
+    async def run():
+        leader = asyncio.ensure_future(client.ainvoke("q", deadline=time.monotonic() + 0.05))
+        await asyncio.sleep(0.01)
+        joined = await client.ainvoke("q")
+        with pytest.raises(asyncio.TimeoutError):
+            await leader
+        return joined
+
+    assert asyncio.run(run()).content == "q #2"
+
+
+def test_sync_callers_share_one_call():
+    model = ScriptedModel(delay=0.1)
+    client = LLMClient(llm=model)
+    replies = []
+
+    threads = [threading.Thread(target=lambda: replies.append(client.invoke("q"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert model.calls == 1
+    assert [reply.content for reply in replies] == ["q #1"] * 3
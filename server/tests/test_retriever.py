@@ -0,0 +1,43 @@
+import pytest
+
+from src.core.temp.retriver import is_lexical_query, reciprocal_rank_fusion
+
+
+def hits(*ids, **fields):
+    return [{"id": id_, "content": id_, **fields} for id_ in ids]
+
+
+def test_fusion_ranks_hits_found_by_both_searches_first():
+    fused = reciprocal_rank_fusion({
+        "vector": hits("a", "b", "c"),
+        "lexical": hits("c", "d")
+    }, k=60)
+
+    assert fused[0]["id"] == "c"
+    assert fused[0]["matched_by"] == ["vector", "lexical"]
+    assert fused[0]["score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert fused[1]["id"] == "a"
+    assert {hit["id"] for hit in fused[2:]} == {"b", "d"}
+
+
+def test_fusion_keeps_fields_from_every_source():
+    fused = reciprocal_rank_fusion({
+        "vector": hits("a", distance=0.2),
+        "lexical": hits("a", bm25=3.5)
+    })
+
+    assert fused[0]["distance"] == 0.2
+    assert fused[0]["bm25"] == 3.5
+
+
+def test_fusion_of_nothing_is_empty():
+    assert reciprocal_rank_fusion({"vector": [], "lexical": []}) == []
+
+
+@pytest.mark.parametrize("query, lexical", [
+    ("XJ-9000", True),
+    ("ERR_TIMEOUT", True),
+    ("how do I reset the device?", False),
+])
+def test_identifier_queries_are_lexical(query, lexical):
+    assert is_lexical_query(query) == lexical